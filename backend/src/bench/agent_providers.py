@@ -0,0 +1,60 @@
+"""Benchmark transaction inference latency per agent provider.
+
+Usage: python -m src.bench.agent_providers --providers gemini,ollama --runs 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from src.account.model import AccountTransfer
+from src.common.llm import create_llm_router
+from src.transaction.agent import TransactionAgent
+
+SAMPLE_TEXTS = [
+    "Lunch $12.50",
+    "Groceries 54.20 yesterday",
+    "Coffee 4.5, taxi 18 and movie tickets 25 last friday",
+    "Transfer 500 from UOB to Maybank",
+]
+CATEGORIES = ["food", "groceries", "transport", "entertainment", "salary", "unknown"]
+ACCOUNTS = [AccountTransfer(id=1, name="UOB"), AccountTransfer(id=2, name="Maybank")]
+
+
+async def bench_provider(name: str, runs: int) -> list[float]:
+    agent = TransactionAgent(router=create_llm_router([name]))
+    latencies = []
+    for run in range(runs):
+        text = SAMPLE_TEXTS[run % len(SAMPLE_TEXTS)]
+        started = time.perf_counter()
+        await agent.infer_from_text(
+            text=text,
+            user_id=0,
+            category_list=CATEGORIES,
+            account_list=ACCOUNTS,
+        )
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--providers", default="fake")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for name in args.providers.split(","):
+        latencies = sorted(await bench_provider(name.strip(), args.runs))
+        p95 = latencies[min(round(len(latencies) * 0.95), len(latencies) - 1)]
+        print(  # noqa: T201
+            f"{name}: runs={len(latencies)} "
+            f"p50={statistics.median(latencies):.2f}s p95={p95:.2f}s "
+            f"max={latencies[-1]:.2f}s",
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""Benchmark event delivery latency of the job event brokers.
+
+Publishes events at a fixed rate while readers follow the stream the way the
+SSE handler does, and reports publish-to-delivery latency per broker.
+
+Usage: python -m src.bench.job_event_broker --brokers memory,redis --events 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import uuid4
+
+from src.config import get_settings
+from src.redis_client import close_redis_pools, get_async_redis_client
+from src.transaction.events import (
+    DONE_EVENT,
+    InProcessJobEventBroker,
+    JobEventBroker,
+    RedisJobEventBroker,
+    job_stream_key,
+)
+
+config = get_settings()
+
+
+def create_broker(name: str) -> JobEventBroker:
+    if name == "memory":
+        return InProcessJobEventBroker(
+            maxlen=config.JOB_STREAM_MAXLEN,
+            ttl_seconds=60,
+            done_ttl_seconds=60,
+        )
+    return RedisJobEventBroker(
+        redis_client=get_async_redis_client(),
+        maxlen=config.JOB_STREAM_MAXLEN,
+        ttl_seconds=60,
+        done_ttl_seconds=60,
+    )
+
+
+async def follow(broker: JobEventBroker, stream: str) -> list[float]:
+    latencies = []
+    last_id = "0-0"
+    while True:
+        for event_id, data in await broker.read(stream, last_id, block=1):
+            last_id = event_id
+            if data == DONE_EVENT:
+                return latencies
+            latencies.append(time.perf_counter() - float(data))
+
+
+async def bench_broker(name: str, events: int, readers: int, rate: float) -> list[float]:
+    broker = create_broker(name)
+    stream = job_stream_key(f"bench-{uuid4()}")
+    followers = [asyncio.create_task(follow(broker, stream)) for _ in range(readers)]
+
+    for _ in range(events):
+        await broker.publish(stream, str(time.perf_counter()))
+        await asyncio.sleep(1 / rate)
+    await broker.finish(stream)
+
+    return [latency for result in await asyncio.gather(*followers) for latency in result]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--brokers", default="memory,redis")
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--readers", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=500, help="events per second")
+    args = parser.parse_args()
+
+    try:
+        for name in args.brokers.split(","):
+            latencies = sorted(
+                await bench_broker(name.strip(), args.events, args.readers, args.rate),
+            )
+            quantiles = statistics.quantiles(latencies, n=100)
+            print(  # noqa: T201
+                f"{name}: deliveries={len(latencies)} "
+                f"p50={quantiles[49] * 1000:.3f}ms p99={quantiles[98] * 1000:.3f}ms "
+                f"max={latencies[-1] * 1000:.3f}ms",
+            )
+    finally:
+        await close_redis_pools()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
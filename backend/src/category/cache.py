@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import re
+import time
+from collections import OrderedDict
+
+from redis import Redis  # noqa: TC002
+
+from src.app_logger.custom_logger import logger
+from src.category.model import CategoryCreate, CategoryListCreate
+from src.config import get_settings
+from src.redis_client import get_redis_client
+from src.transaction.model import EntryType
+
+config = get_settings()
+
+STOP_WORDS = frozenset(
+    ["a", "an", "and", "are", "as", "at", "for", "i", "im", "in", "is", "my"]
+    + ["of", "on", "the", "to", "with"],
+)
+
+DEFAULT_CATEGORY_SUGGESTIONS = CategoryListCreate(
+    category_list=[
+        CategoryCreate(name=name, entry_type=entry_type, user_id=1)
+        for name, entry_type in (
+            ("Food & Dining", EntryType.debit),
+            ("Groceries", EntryType.debit),
+            ("Transport", EntryType.debit),
+            ("Bills & Utilities", EntryType.debit),
+            ("Shopping", EntryType.debit),
+            ("Entertainment", EntryType.debit),
+            ("Salary", EntryType.credit),
+        )
+    ],
+)
+
+
+def normalize_summary(text: str | None) -> str | None:
+    """Reduce a user summary to its sorted set of meaningful words.
+
+    Summaries that only differ in casing, punctuation, word order or filler
+    words share a key. Returns None when nothing meaningful is left.
+    """
+    if text is None:
+        return None
+
+    words = {
+        word
+        for word in re.findall(r"[a-z0-9]+", text.casefold())
+        if word not in STOP_WORDS
+    }
+    return " ".join(sorted(words)) or None
+
+
+class MemorySuggestionStore:
+    """Per-process LRU with a TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.__entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def get(self, key: str) -> str | None:
+        entry = self.__entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.__entries[key]
+            return None
+
+        self.__entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.__entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.max_entries:
+            self.__entries.popitem(last=False)
+
+
+class RedisSuggestionStore:
+    """Shared across workers; entries expire after the TTL."""
+
+    def __init__(self, redis_client: Redis, ttl_seconds: int) -> None:
+        self.redis_client = redis_client
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> str | None:
+        return self.redis_client.get(f"category:suggest:{key}")  # type: ignore[return-value]
+
+    def set(self, key: str, value: str) -> None:
+        self.redis_client.set(f"category:suggest:{key}", value, ex=self.ttl_seconds)
+
+
+class CategorySuggestionCache:
+    """Caches onboarding category suggestions by normalized summary text."""
+
+    def __init__(self, store: MemorySuggestionStore | RedisSuggestionStore) -> None:
+        self.store = store
+
+    def get(self, key: str) -> CategoryListCreate | None:
+        try:
+            value = self.store.get(key)
+        except Exception as err:  # noqa: BLE001
+            logger.warning("Category suggestion cache read failed: %s", err)
+            return None
+
+        if value is None:
+            return None
+        return CategoryListCreate.model_validate_json(value)
+
+    def set(self, key: str, suggestions: CategoryListCreate) -> None:
+        try:
+            self.store.set(key, suggestions.model_dump_json())
+        except Exception as err:  # noqa: BLE001
+            logger.warning("Category suggestion cache write failed: %s", err)
+
+
+def _create_category_suggestion_cache() -> CategorySuggestionCache:
+    if config.CATEGORY_SUGGEST_CACHE_BACKEND == "redis":
+        return CategorySuggestionCache(
+            RedisSuggestionStore(
+                redis_client=get_redis_client(),
+                ttl_seconds=config.CATEGORY_SUGGEST_CACHE_TTL_SECONDS,
+            ),
+        )
+
+    return CategorySuggestionCache(
+        MemorySuggestionStore(
+            max_entries=config.CATEGORY_SUGGEST_CACHE_MAX_ENTRIES,
+            ttl_seconds=config.CATEGORY_SUGGEST_CACHE_TTL_SECONDS,
+        ),
+    )
+
+
+category_suggestion_cache = _create_category_suggestion_cache()
+
+
+def get_category_suggestion_cache() -> CategorySuggestionCache:
+    return category_suggestion_cache
@@ -78,7 +78,7 @@ def get_category(
     response_model=CategoryListCreate,
     tags=[CATEGORY_TAG],
 )
-def suggest_categories(
+async def suggest_categories(
     query: CategorySuggestRequest,
     category_service: Annotated[
         CategoryService,
@@ -86,6 +86,6 @@ def suggest_categories(
     ],
 ):
     try:
-        return category_service.suggest_categories(query.text)
+        return await category_service.suggest_categories(query.text)
     except Exception as err:
         raise HTTPException(status_code=500, detail=err)
@@ -3,8 +3,15 @@ from __future__ import annotations
 from typing import Annotated
 
 from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
 
 from src.app_logger.custom_logger import logger
+from src.category.cache import (
+    DEFAULT_CATEGORY_SUGGESTIONS,
+    CategorySuggestionCache,
+    get_category_suggestion_cache,
+    normalize_summary,
+)
 from src.category.model import CategoryCreate, CategoryListCreate, CategorySA
 from src.category.repository import CategoryRepository, get_category_repository
 from src.common.llm import LLMService, get_llm_service
@@ -15,9 +22,11 @@ class CategoryService:
         self,
         llm_service: LLMService,
         category_repository: CategoryRepository,
+        suggestion_cache: CategorySuggestionCache,
     ):
         self.llm_service = llm_service
         self.category_repository = category_repository
+        self.suggestion_cache = suggestion_cache
 
     def create_category(
         self,
@@ -78,13 +87,25 @@ class CategoryService:
         </instructions>
         """
 
-    def suggest_categories(self, text: str | None):
+    async def suggest_categories(self, text: str | None):
+        summary_key = normalize_summary(text)
+        if summary_key is None:
+            # Nothing to tailor to, so the precomputed set is as good as the model's
+            return DEFAULT_CATEGORY_SUGGESTIONS
+
+        cached = await run_in_threadpool(self.suggestion_cache.get, summary_key)
+        if cached is not None:
+            logger.info("Serving cached category suggestions for %s", summary_key)
+            return cached
+
         prompt = self.__create_category_suggestion_prompt(text)
         logger.info(prompt)
-        return self.llm_service.query_llm_with_validator(
+        suggestions = await self.llm_service.aquery_llm_with_validator(
             prompt=prompt,
             validator=CategoryListCreate,
         )
+        await run_in_threadpool(self.suggestion_cache.set, summary_key, suggestions)
+        return suggestions
 
 
 def get_category_service(
@@ -96,8 +117,13 @@ def get_category_service(
         LLMService,
         Depends(get_llm_service),
     ],
+    suggestion_cache: Annotated[
+        CategorySuggestionCache,
+        Depends(get_category_suggestion_cache),
+    ],
 ):
     return CategoryService(
         llm_service=llm_service,
         category_repository=category_repository,
+        suggestion_cache=suggestion_cache,
     )
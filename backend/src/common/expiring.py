@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import time
+from typing import Generic, TypeVar
+
+V = TypeVar("V")
+
+# How often expired entries are swept, reads skip them in between
+SWEEP_INTERVAL_SECONDS = 60
+
+
+class ExpiringDict(Generic[V]):
+    """Per-process stand-in for Redis keys with a TTL.
+
+    Expired entries are never returned, and are swept out now and then on
+    writes so keys nobody reads again do not pile up.
+    """
+
+    def __init__(self) -> None:
+        self.__entries: dict[str, tuple[float, V]] = {}
+        self.__next_sweep = time.monotonic() + SWEEP_INTERVAL_SECONDS
+
+    def get(self, key: str) -> V | None:
+        entry = self.__entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.__entries[key]
+            return None
+        return value
+
+    def set(self, key: str, value: V, ttl: float) -> None:
+        now = time.monotonic()
+        self.__entries[key] = (now + ttl, value)
+        if now >= self.__next_sweep:
+            self.__next_sweep = now + SWEEP_INTERVAL_SECONDS
+            for expired in [
+                entry_key
+                for entry_key, (expires_at, _) in self.__entries.items()
+                if expires_at <= now
+            ]:
+                del self.__entries[expired]
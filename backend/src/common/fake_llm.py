@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+from datetime import datetime, timezone
+from enum import Enum
+from types import SimpleNamespace
+from typing import Any, Union, get_args, get_origin
+
+from google.genai import types
+from pydantic import BaseModel
+
+from src.config import get_settings
+from src.transaction.prompt import CREATE_BANK_TRANSFER_TOOL, CREATE_TRANSACTION_TOOL
+
+config = get_settings()
+
+AMOUNT_PATTERN = re.compile(r"[-+]?\$?\s?(\d+(?:[.,]\d{1,2})?)")
+ITEM_SEPARATOR_PATTERN = re.compile(r"\n|;|,(?!\d)|\band\b", flags=re.IGNORECASE)
+CATEGORIES_PATTERN = re.compile(r"^CATEGORIES: (.*)$", flags=re.MULTILINE)
+ACCOUNTS_PATTERN = re.compile(r"^ACCOUNTS \(id=name\): (.*)$", flags=re.MULTILINE)
+
+
+class FakeLLMError(Exception):
+    """Injected failure of the fake provider."""
+
+
+class FakeLatency:
+    """Samples call latency and injected failures from `Settings`.
+
+    Lets load tests exercise the DB, Redis and SSE side of the pipeline with
+    realistic model timings without paying for model calls.
+    """
+
+    def __init__(self) -> None:
+        self.random = random.Random(config.FAKE_LLM_SEED)  # noqa: S311
+        self.distribution = config.FAKE_LLM_LATENCY_DISTRIBUTION
+        self.mean = config.FAKE_LLM_LATENCY_MEAN_MS / 1000
+        self.stddev = config.FAKE_LLM_LATENCY_STDDEV_MS / 1000
+        self.failure_rate = config.FAKE_LLM_FAILURE_RATE
+
+    def sample(self) -> float:
+        if self.distribution == "fixed" or self.mean <= 0:
+            return max(self.mean, 0)
+        if self.distribution == "exponential":
+            return self.random.expovariate(1 / self.mean)
+        if self.distribution == "normal":
+            return max(self.random.gauss(self.mean, self.stddev), 0)
+
+        # lognormal, parameterised by the mean and stddev of the latency itself
+        variance = self.stddev**2
+        sigma2 = math.log1p(variance / self.mean**2)
+        mu = math.log(self.mean) - sigma2 / 2
+        return self.random.lognormvariate(mu, sigma2**0.5)
+
+    def maybe_fail(self, call: str) -> None:
+        if self.random.random() < self.failure_rate:
+            msg = f"Injected failure in fake {call}"
+            raise FakeLLMError(msg)
+
+    async def await_(self, call: str) -> None:
+        await asyncio.sleep(self.sample())
+        self.maybe_fail(call)
+
+
+fake_latency = FakeLatency()
+
+
+def split_items(text: str) -> list[str]:
+    """Split free text into financial items the way a user would list them."""
+    return [item.strip() for item in ITEM_SEPARATOR_PATTERN.split(text) if item.strip()]
+
+
+def parse_amount(item: str) -> float:
+    match = AMOUNT_PATTERN.search(item)
+    if match is None:
+        return 0.0
+    return float(match.group(1).replace(",", "."))
+
+
+def strip_amount(item: str) -> str:
+    name = AMOUNT_PATTERN.sub("", item).strip(" -:$")
+    return name or item
+
+
+def estimate_tokens(*texts: str) -> int:
+    return max(sum(len(text) for text in texts) // 4, 1)
+
+
+def _stable_int(text: str) -> int:
+    return int(hashlib.sha1(text.encode(), usedforsecurity=False).hexdigest()[:8], 16)
+
+
+def fake_value(annotation: Any, seed: str, words: list[str]) -> Any:
+    """Build a deterministic value for a type annotation."""
+    origin = get_origin(annotation)
+
+    if origin is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return fake_value(args[0], seed, words) if args else None
+
+    if origin in (list, tuple, set):
+        (item_type, *_) = get_args(annotation) or (str,)
+        items = [fake_value(item_type, f"{seed}:{index}", words) for index in range(3)]
+        return items if origin is list else origin(items)
+
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return fake_model(annotation, seed, words)
+        if issubclass(annotation, Enum):
+            members = list(annotation)
+            return members[_stable_int(seed) % len(members)]
+        if issubclass(annotation, bool):
+            return False
+        if issubclass(annotation, int):
+            return 1
+        if issubclass(annotation, float):
+            return float(_stable_int(seed) % 100)
+
+    return words[_stable_int(seed) % len(words)].title()
+
+
+def fake_model(validator: type[BaseModel], seed: str, words: list[str]) -> BaseModel:
+    values = {
+        field_name: fake_value(field.annotation, f"{seed}:{field_name}", words)
+        for field_name, field in validator.model_fields.items()
+    }
+    return validator.model_validate(values)
+
+
+class _AsyncFakeCompletions:
+    def __init__(self, hooks: dict[str, list]) -> None:
+        self.hooks = hooks
+
+    def _build(self, messages: list[dict], response_model: type[BaseModel], **kwargs):
+        for handler in self.hooks.get("completion:kwargs", []):
+            handler(messages=messages, response_model=response_model, **kwargs)
+
+        prompt = " ".join(str(message.get("content", "")) for message in messages)
+        words = re.findall(r"[A-Za-z]{4,}", prompt) or ["item"]
+        response = fake_model(response_model, prompt, words)
+        completion = SimpleNamespace(
+            usage=SimpleNamespace(
+                prompt_tokens=estimate_tokens(prompt),
+                completion_tokens=estimate_tokens(response.model_dump_json()),
+                prompt_tokens_details=None,
+            ),
+        )
+        return response, completion
+
+    async def create_with_completion(self, messages, response_model, **kwargs):
+        await fake_latency.await_("structured output")
+        return self._build(messages, response_model, **kwargs)
+
+    async def create(self, messages, response_model, **kwargs):
+        return (
+            await self.create_with_completion(messages, response_model, **kwargs)
+        )[0]
+
+
+class FakeInstructorClient:
+    """Mimics the parts of an instructor client `LLMService` uses.
+
+    Responses are filled deterministically from the response model's fields
+    and the words of the prompt.
+    """
+
+    def __init__(self) -> None:
+        self.hooks: dict[str, list] = {}
+        self.chat = SimpleNamespace(completions=_AsyncFakeCompletions(self.hooks))
+
+    def on(self, event: str, handler) -> None:
+        self.hooks.setdefault(event, []).append(handler)
+
+
+def _instruction_of(generate_config: types.GenerateContentConfig | None) -> str:
+    if generate_config is None or generate_config.system_instruction is None:
+        return ""
+    return str(generate_config.system_instruction)
+
+
+def _tool_calls(text: str, instruction: str) -> list[types.FunctionCall]:
+    categories_match = CATEGORIES_PATTERN.search(instruction)
+    categories = categories_match.group(1).split("|") if categories_match else []
+    accounts_match = ACCOUNTS_PATTERN.search(instruction)
+    accounts = [
+        account.split("=", 1)
+        for account in (accounts_match.group(1).split(";") if accounts_match else [])
+        if "=" in account
+    ]
+    today = datetime.now(tz=timezone.utc).date().strftime("%Y-%m-%d")
+
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError:
+        items = split_items(text)
+
+    calls = []
+    for item in items if isinstance(items, list) else [text]:
+        item = str(item)
+        lowered = item.lower()
+        mentioned = [
+            (int(account_id), name)
+            for account_id, name in accounts
+            if name and name.lower() in lowered
+        ]
+        if len(mentioned) >= 2:  # noqa: PLR2004
+            mentioned.sort(key=lambda account: lowered.index(account[1].lower()))
+            (from_id, from_name), (to_id, to_name) = mentioned[:2]
+            calls.append(
+                types.FunctionCall(
+                    name=CREATE_BANK_TRANSFER_TOOL,
+                    args={
+                        "bank_from": {"id": from_id, "name": from_name},
+                        "bank_to": {"id": to_id, "name": to_name},
+                        "amount": parse_amount(item),
+                        "date": today,
+                    },
+                ),
+            )
+            continue
+
+        category = next(
+            (category for category in categories if category and category in lowered),
+            "unknown",
+        )
+        calls.append(
+            types.FunctionCall(
+                name=CREATE_TRANSACTION_TOOL,
+                args={
+                    "name": strip_amount(item)[:30],
+                    "amount": parse_amount(item),
+                    "category_name": category,
+                    "date": today,
+                },
+            ),
+        )
+    return calls
+
+
+def _fake_response(
+    contents: list[str],
+    generate_config: types.GenerateContentConfig | None,
+) -> types.GenerateContentResponse:
+    text = "\n".join(str(content) for content in contents)
+    text = text.removeprefix("<transaction>").removesuffix("</transaction>")
+    instruction = _instruction_of(generate_config)
+
+    if generate_config is not None and generate_config.tools:
+        parts = [
+            types.Part(function_call=function_call)
+            for function_call in _tool_calls(text, instruction)
+        ]
+        output = json.dumps([part.function_call.args for part in parts])  # type: ignore[union-attr]
+    else:
+        try:
+            names = json.loads(text)
+        except json.JSONDecodeError:
+            names = None
+
+        if isinstance(names, list):
+            # Batched category suggestion
+            categories_match = CATEGORIES_PATTERN.search(instruction)
+            categories = (
+                categories_match.group(1).split("|") if categories_match else []
+            )
+            output = json.dumps(
+                [
+                    [
+                        categories[(_stable_int(str(name)) + offset) % len(categories)]
+                        for offset in range(min(3, len(categories)))
+                    ]
+                    for name in names
+                ],
+            )
+        else:
+            # Text formatting into one element per item
+            output = json.dumps(split_items(text))
+        parts = [types.Part(text=output)]
+
+    return types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(content=types.Content(role="model", parts=parts)),
+        ],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=estimate_tokens(instruction, text),
+            candidates_token_count=estimate_tokens(output),
+        ),
+    )
+
+
+class _AsyncFakeModels:
+    async def generate_content(self, model: str, contents, config=None):
+        await fake_latency.await_(model)
+        return _fake_response(contents, config)
+
+    async def generate_content_stream(self, model: str, contents, config=None):
+        response = await self.generate_content(
+            model=model,
+            contents=contents,
+            config=config,
+        )
+
+        async def stream():
+            yield response
+
+        return stream()
+
+
+class FakeGenaiClient:
+    """Mimics the parts of `genai.Client` `TransactionAgent` uses.
+
+    Tool calls are parsed from the input text: items mentioning two accounts
+    from the instruction become bank transfers, everything else a transaction
+    whose category is the first listed category found in the item.
+    """
+
+    def __init__(self) -> None:
+        self.aio = SimpleNamespace(models=_AsyncFakeModels())
@@ -1,76 +1,102 @@
+import asyncio
+from functools import lru_cache
 from typing import TypeVar
 
-import instructor
-from openai import OpenAI
+from instructor.exceptions import InstructorRetryException
 from openai.types.chat import ChatCompletionMessageParam
 from pydantic import BaseModel
 
 from src.app_logger.custom_logger import logger
+from src.common.llm_router import LLMRouter, ProviderHealth, RoutedProvider
+from src.common.metrics import LLM_LOCAL_REPAIRS
+from src.common.providers import LLMProvider, get_llm_provider, provider_models
+from src.common.repair import RepairError, completion_text, repair_model
 from src.config import get_settings
 
 config = get_settings()
 
 USE_BEDROCK = config.USE_BEDROCK
 USE_GEMINI = config.USE_GEMINI
+USE_FAKE_LLM = config.USE_FAKE_LLM
 
 
-def get_model_id():
+def get_provider():
+    if USE_FAKE_LLM:
+        return "fake"
     if USE_BEDROCK:
-        return "anthropic.claude-3-haiku-20240307-v1:0"
+        return "bedrock"
     if USE_GEMINI:
-        return "gemini-2.0-flash-lite"
-    return "gemma3:12b"
+        return "gemini"
+    return "ollama"
 
 
-MODEL_ID = get_model_id()
+PROVIDER = get_provider()
 
-instructor_client = instructor.from_openai(
-    OpenAI(
-        base_url="http://localhost:11434/v1",
-        api_key="ollama",  # required, but unused
-    ),
-    mode=instructor.Mode.JSON,
-)
+T = TypeVar("T", bound=BaseModel)
 
-client = OpenAI(
-    base_url="http://localhost:11434",
-    api_key="ollama",  # required, but unused
-)
 
-if USE_GEMINI:
-    GCP_KEY = config.GCP_KEY
+def router_provider_names(default: str) -> list[str]:
+    """Return `LLM_ROUTER_PROVIDERS` in priority order, or just `default`."""
+    return [
+        name.strip() for name in config.LLM_ROUTER_PROVIDERS.split(",") if name.strip()
+    ] or [default]
+
+
+def get_agent_provider_names() -> list[str]:
+    """Return the providers of `TransactionAgent` in priority order.
+
+    `AGENT_PROVIDER` takes a comma separated list like
+    `LLM_ROUTER_PROVIDERS`, which is used when it is empty.
+    """
+    return [
+        name.strip() for name in config.AGENT_PROVIDER.split(",") if name.strip()
+    ] or router_provider_names("fake" if USE_FAKE_LLM else "gemini")
+
+
+def create_llm_router(provider_names: list[str]) -> LLMRouter:
+    """Build a router over the shared providers called `provider_names`."""
+    return LLMRouter(
+        providers=[
+            RoutedProvider(
+                provider=get_llm_provider(name),
+                health=ProviderHealth(
+                    window=config.LLM_HEALTH_WINDOW,
+                    unhealthy_error_rate=config.LLM_UNHEALTHY_ERROR_RATE,
+                ),
+            )
+            for name in provider_names
+        ],
+        hedge_percentile=config.LLM_HEDGE_PERCENTILE,
+        default_hedge_delay=config.LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+        default_deadline=config.LLM_DEADLINE_SECONDS,
+    )
 
-    from google import genai
 
-    client = genai.Client(api_key=GCP_KEY)
+@lru_cache
+def get_llm_router() -> LLMRouter:
+    """Return the router `LLMService` sends its calls through."""
+    return create_llm_router(router_provider_names(PROVIDER))
 
-    instructor_client = instructor.from_genai(
-        client=client,
-        mode=instructor.Mode.GENAI_STRUCTURED_OUTPUTS,
-    )
 
-if USE_BEDROCK:
-    from anthropic import AnthropicBedrock
+def ollama_models() -> list[str]:
+    """Return the Ollama models `LLMService` and `TransactionAgent` may call."""
+    models = provider_models("ollama")
+    kinds = []
+    if "ollama" in router_provider_names(PROVIDER):
+        kinds.append("structured")
+    if "ollama" in get_agent_provider_names():
+        kinds.extend(("small", "large"))
+    return list(dict.fromkeys(models[kind] for kind in kinds))
 
-    AWS_KEY = config.AWS_KEY
-    AWS_SECRET_KEY = config.AWS_SECRET_KEY
 
-    instructor_client = instructor.from_anthropic(
-        AnthropicBedrock(
-            aws_access_key=AWS_KEY,
-            aws_secret_key=AWS_SECRET_KEY,
-            aws_region="ap-northeast-1",
-        )
-    )
+def uses_ollama() -> bool:
+    """Return whether `LLMService` or `TransactionAgent` may call Ollama."""
+    return bool(ollama_models())
 
-    client = AnthropicBedrock(
-        aws_access_key=AWS_KEY,
-        aws_secret_key=AWS_SECRET_KEY,
-        aws_region="ap-northeast-1",
-    )
-T = TypeVar("T", bound=BaseModel)
 
-logger.info("Using client %s and instructor %s", client, instructor_client)
+# Bounds the number of in-flight async LLM calls per worker so a burst of
+# inference jobs queues on the event loop instead of hammering the provider.
+llm_semaphore = asyncio.Semaphore(config.LLM_MAX_CONCURRENCY)
 
 
 class LLMService:
@@ -84,19 +110,106 @@ class LLMService:
             },
         ]
 
-    def query_llm_with_validator(self, prompt: str, validator: type[T]) -> T:
-        """Return response model from LLM."""
+    def __repair(
+        self,
+        err: InstructorRetryException,
+        validator: type[T],
+        provider: str,
+        model: str,
+        call: str,
+    ) -> T | None:
+        """Try to fix the rejected output locally instead of re-asking."""
+        text = completion_text(err.last_completion)
+        labels = {"provider": provider, "model": model, "call": call}
+        if text is None:
+            LLM_LOCAL_REPAIRS.labels(**labels, outcome="failed").inc()
+            return None
+
+        try:
+            response = repair_model(text, validator)
+        except RepairError as repair_err:
+            logger.info("Could not repair %s output locally: %s", call, repair_err)
+            LLM_LOCAL_REPAIRS.labels(**labels, outcome="failed").inc()
+            return None
+
+        LLM_LOCAL_REPAIRS.labels(**labels, outcome="repaired").inc()
+        return response
+
+    def __create_reask_message(
+        self,
+        request_message: list[ChatCompletionMessageParam],
+        err: InstructorRetryException,
+    ) -> list[ChatCompletionMessageParam]:
+        """Return the conversation with the rejected output and why it failed."""
+        text = completion_text(err.last_completion)
+        if text is None:
+            return request_message
+
+        return [
+            *request_message,
+            {"role": "assistant", "content": text},
+            {
+                "role": "user",
+                "content": (
+                    "Your response failed validation with the following error, "
+                    f"correct it and answer again:\n{err}"
+                ),
+            },
+        ]
+
+    async def aquery_llm_with_validator(
+        self,
+        prompt: str,
+        validator: type[T],
+        deadline: float | None = None,
+    ) -> T:
+        """Return response model from LLM without blocking the event loop.
+
+        The call goes through the provider router, so it is bounded by
+        `deadline` (default `LLM_DEADLINE_SECONDS`) and hedged onto the next
+        configured provider when the first one is slow or failing. Invalid
+        output is repaired locally, and only when that fails re-asked once
+        with the validation error.
+        """
         request_message = self.__create_llm_message(prompt=prompt)
         logger.info(
-            "Received prompt of %s",
+            "Received async prompt of %s",
             prompt,
         )
-        return instructor_client.chat.completions.create(
-            model=MODEL_ID,
-            # max_tokens=2000,
-            messages=request_message,
-            response_model=validator,
-        )
+
+        async def request(provider: LLMProvider, model: str):
+            try:
+                return await provider.structured(
+                    model=model,
+                    messages=request_message,
+                    response_model=validator,
+                )
+            except InstructorRetryException as err:
+                repaired = self.__repair(
+                    err,
+                    validator,
+                    provider.name,
+                    model,
+                    "aquery_llm_with_validator",
+                )
+                if repaired is not None:
+                    return repaired, err.last_completion
+
+                return await provider.structured(
+                    model=model,
+                    messages=self.__create_reask_message(request_message, err),
+                    response_model=validator,
+                    max_retries=1,
+                )
+
+        async with llm_semaphore:
+            return await get_llm_router().call(
+                "aquery_llm_with_validator",
+                request,
+                size="structured",
+                prompt_chars=len(prompt),
+                deadline=deadline,
+            )
 
     # def query_llm(self, prompt: str):
     #     try:
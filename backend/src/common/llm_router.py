@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from src.app_logger.custom_logger import logger
+from src.common.metrics import observe_llm_call
+
+if TYPE_CHECKING:
+    from src.common.providers import LLMProvider
+
+R = TypeVar("R")
+
+
+class AllProvidersFailedError(Exception):
+    """Raised when every provider a call was routed to failed."""
+
+
+class ProviderHealth:
+    """Rolling window of recent latencies and outcomes for one provider."""
+
+    def __init__(self, window: int, unhealthy_error_rate: float) -> None:
+        self.unhealthy_error_rate = unhealthy_error_rate
+        self.__samples: deque[tuple[float, bool]] = deque(maxlen=window)
+
+    def record(self, latency: float, ok: bool) -> None:  # noqa: FBT001
+        self.__samples.append((latency, ok))
+
+    @property
+    def error_rate(self) -> float:
+        if not self.__samples:
+            return 0.0
+        return sum(1 for _, ok in self.__samples if not ok) / len(self.__samples)
+
+    @property
+    def healthy(self) -> bool:
+        # Need a few samples before judging, a single failure is not a trend
+        if len(self.__samples) < 5:  # noqa: PLR2004
+            return True
+        return self.error_rate < self.unhealthy_error_rate
+
+    def latency_percentile(self, percentile: float) -> float | None:
+        """Return the latency at `percentile` (0-1) of successful calls."""
+        latencies = sorted(latency for latency, ok in self.__samples if ok)
+        if len(latencies) < 5:  # noqa: PLR2004
+            return None
+        quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        return quantiles[min(max(round(percentile * 100) - 1, 0), 98)]
+
+
+@dataclass
+class RoutedProvider:
+    """A provider the router can send calls to."""
+
+    provider: LLMProvider
+    health: ProviderHealth = field(repr=False)
+
+    @property
+    def name(self) -> str:
+        return self.provider.name
+
+    def model(self, size: str) -> str:
+        """Return the provider's "small", "large" or "structured" model."""
+        return self.provider.models[size]
+
+
+class LLMRouter:
+    """Routes a call across providers with deadlines and hedging.
+
+    Healthy providers are tried in configured order. The call starts on the
+    first one; if it has not answered within its recent latency percentile
+    (or it fails), the call is also started on the next provider, whichever
+    answers first wins and the other is cancelled. The whole call is bounded
+    by a deadline.
+    """
+
+    def __init__(
+        self,
+        providers: list[RoutedProvider],
+        hedge_percentile: float,
+        default_hedge_delay: float,
+        default_deadline: float,
+    ) -> None:
+        self.providers = providers
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.default_deadline = default_deadline
+
+    def ordered_providers(self) -> list[RoutedProvider]:
+        healthy = [provider for provider in self.providers if provider.health.healthy]
+        unhealthy = [
+            provider for provider in self.providers if not provider.health.healthy
+        ]
+        return healthy + unhealthy
+
+    def hedge_delay(self, provider: RoutedProvider) -> float:
+        delay = provider.health.latency_percentile(self.hedge_percentile)
+        return self.default_hedge_delay if delay is None else delay
+
+    async def __attempt(
+        self,
+        provider: RoutedProvider,
+        call: str,
+        size: str,
+        prompt_chars: int,
+        request: Callable[[LLMProvider, str], Awaitable[tuple[R, Any]]],
+    ) -> R:
+        started = time.perf_counter()
+        model = provider.model(size)
+        try:
+            async with observe_llm_call(
+                provider=provider.name,
+                model=model,
+                call=call,
+                prompt_chars=prompt_chars,
+            ) as recorder:
+                response, completion = await request(provider.provider, model)
+                recorder.record_usage(completion)
+        except asyncio.CancelledError:
+            # Losing a race says nothing about the provider's health
+            raise
+        except Exception:
+            provider.health.record(time.perf_counter() - started, ok=False)
+            raise
+
+        provider.health.record(time.perf_counter() - started, ok=True)
+        return response
+
+    async def call(
+        self,
+        call: str,
+        request: Callable[[LLMProvider, str], Awaitable[tuple[R, Any]]],
+        size: str = "small",
+        prompt_chars: int = 0,
+        deadline: float | None = None,
+    ) -> R:
+        """Run `request` against the providers and return the first success.
+
+        Args:
+            call: Call name used for metrics and logs
+            request: Coroutine factory returning (response, raw completion)
+                for a given provider and model
+            size: Which of each provider's models to use, "small", "large"
+                or "structured"
+            prompt_chars: Prompt size, recorded on slow calls
+            deadline: Seconds the whole call may take, defaults to the router's
+
+        Raises:
+            TimeoutError: If no provider answered before the deadline
+            AllProvidersFailedError: If every provider tried failed
+
+        """
+        providers = self.ordered_providers()
+        pending: dict[asyncio.Task, RoutedProvider] = {}
+        errors: list[BaseException] = []
+
+        def start(provider: RoutedProvider) -> None:
+            task = asyncio.create_task(
+                self.__attempt(provider, call, size, prompt_chars, request),
+            )
+            pending[task] = provider
+
+        try:
+            async with asyncio.timeout(deadline or self.default_deadline):
+                start(providers.pop(0))
+
+                while pending:
+                    wait_for = (
+                        self.hedge_delay(next(iter(pending.values())))
+                        if providers
+                        else None
+                    )
+                    done, _ = await asyncio.wait(
+                        pending,
+                        timeout=wait_for,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+
+                    if not done:
+                        hedge = providers.pop(0)
+                        logger.info("Hedging %s call on %s", call, hedge.name)
+                        start(hedge)
+                        continue
+
+                    for task in done:
+                        provider = pending.pop(task)
+                        if task.exception() is None:
+                            return task.result()
+
+                        logger.warning(
+                            "LLM call %s failed on %s: %r",
+                            call,
+                            provider.name,
+                            task.exception(),
+                        )
+                        errors.append(task.exception())  # type: ignore[arg-type]
+
+                    if not pending and providers:
+                        # Fall back straight away rather than waiting for a hedge
+                        start(providers.pop(0))
+        finally:
+            for task in pending:
+                task.cancel()
+
+        msg = f"All providers failed for {call}"
+        raise AllProvidersFailedError(msg, errors)
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar
+from typing import Any
+
+from prometheus_client import Counter, Gauge, Histogram, make_asgi_app
+
+from src.app_logger.custom_logger import logger
+from src.config import get_settings
+
+config = get_settings()
+
+LLM_LABELS = ["provider", "model", "call"]
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 21, 34, 60)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_seconds",
+    "Wall time of a model call",
+    LLM_LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+LLM_FIRST_CHUNK_SECONDS = Histogram(
+    "llm_first_chunk_seconds",
+    "Time until the first chunk of a model response arrived",
+    LLM_LABELS,
+    buckets=LATENCY_BUCKETS,
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens",
+    "Prompt tokens billed per model call",
+    LLM_LABELS,
+    buckets=TOKEN_BUCKETS,
+)
+LLM_COMPLETION_TOKENS = Histogram(
+    "llm_completion_tokens",
+    "Completion tokens billed per model call",
+    LLM_LABELS,
+    buckets=TOKEN_BUCKETS,
+)
+LLM_RETRIES = Histogram(
+    "llm_retries",
+    "Instructor re-asks per model call",
+    LLM_LABELS,
+    buckets=(0, 1, 2, 3, 5),
+)
+LLM_ERRORS = Counter(
+    "llm_call_errors_total",
+    "Failed model calls by error class",
+    [*LLM_LABELS, "error"],
+)
+LLM_LOCAL_REPAIRS = Counter(
+    "llm_local_repairs_total",
+    "Invalid model output repaired locally, by whether the repair succeeded",
+    [*LLM_LABELS, "outcome"],
+)
+LLM_COLD_START_CALLS = Counter(
+    "llm_cold_start_calls_total",
+    "Model calls made while the local model was not loaded",
+    LLM_LABELS,
+)
+
+INFERENCE_SECONDS = Histogram(
+    "transaction_inference_seconds",
+    "Time from job start until every item of a create-by-text job is categorized",
+    ["speculative"],
+    buckets=LATENCY_BUCKETS,
+)
+SPECULATIVE_SUGGESTIONS = Counter(
+    "speculative_category_suggestions_total",
+    "Speculative category suggestions by outcome: used, wasted, cancelled or failed",
+    ["outcome"],
+)
+AGENT_ROUTE_OUTCOMES = Counter(
+    "agent_route_outcomes_total",
+    "Inference model routing decisions by route and how the inference went",
+    ["route", "model", "outcome"],
+)
+INFERENCE_QUEUE_DEPTH = Gauge(
+    "inference_queue_depth",
+    "Create-by-text jobs in the queue by state",
+    ["state"],
+)
+INFERENCE_JOBS = Counter(
+    "inference_jobs_total",
+    "Create-by-text jobs handled by the workers by outcome",
+    ["outcome"],
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    "redis_pool_connections",
+    "Connections of the shared Redis pools by client and state",
+    ["client", "state"],
+)
+USER_EVENTS_CLIENTS = Gauge(
+    "user_events_clients",
+    "Clients connected to the per-user event streams",
+)
+USER_EVENTS_SLOW_CONSUMERS = Counter(
+    "user_events_slow_consumers_total",
+    "User event stream clients disconnected for falling behind",
+)
+
+current_llm_call: ContextVar[LLMCallRecorder | None] = ContextVar(
+    "current_llm_call",
+    default=None,
+)
+
+
+def extract_token_usage(response: Any) -> tuple[int | None, int | None, int | None]:
+    """Return (prompt, completion, cached) token counts from a raw response.
+
+    Handles the usage shapes of the three providers we talk to: genai's
+    `usage_metadata`, OpenAI's `usage.prompt_tokens` and Anthropic's
+    `usage.input_tokens`.
+    """
+    usage_metadata = getattr(response, "usage_metadata", None)
+    if usage_metadata is not None:
+        return (
+            usage_metadata.prompt_token_count,
+            usage_metadata.candidates_token_count,
+            usage_metadata.cached_content_token_count,
+        )
+
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None, None, None
+
+    if hasattr(usage, "prompt_tokens"):
+        details = getattr(usage, "prompt_tokens_details", None)
+        return (
+            usage.prompt_tokens,
+            usage.completion_tokens,
+            getattr(details, "cached_tokens", None),
+        )
+
+    return (
+        getattr(usage, "input_tokens", None),
+        getattr(usage, "output_tokens", None),
+        getattr(usage, "cache_read_input_tokens", None),
+    )
+
+
+class LLMCallRecorder:
+    """Times one model call and records it on exit.
+
+    Usable as a sync or async context manager. While it is active it is also
+    published through `current_llm_call` so instructor hooks can count
+    attempts for the call that triggered them.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        call: str,
+        prompt_chars: int = 0,
+    ) -> None:
+        self.labels = {"provider": provider, "model": model, "call": call}
+        self.prompt_chars = prompt_chars
+        self.attempts = 0
+        self.prompt_tokens: int | None = None
+        self.completion_tokens: int | None = None
+        self.cached_tokens: int | None = None
+        self.__started = 0.0
+        self.__first_chunk: float | None = None
+        self.__token = None
+
+    def first_chunk(self) -> None:
+        if self.__first_chunk is None:
+            self.__first_chunk = time.perf_counter() - self.__started
+
+    def record_usage(self, response: Any) -> None:
+        prompt_tokens, completion_tokens, cached_tokens = extract_token_usage(
+            response,
+        )
+        self.prompt_tokens = (self.prompt_tokens or 0) + (prompt_tokens or 0)
+        self.completion_tokens = (self.completion_tokens or 0) + (
+            completion_tokens or 0
+        )
+        self.cached_tokens = (self.cached_tokens or 0) + (cached_tokens or 0)
+
+    def __enter__(self) -> LLMCallRecorder:
+        self.__started = time.perf_counter()
+        self.__token = current_llm_call.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.__token is not None:
+            current_llm_call.reset(self.__token)
+        self.__observe(exc_type)
+
+    async def __aenter__(self) -> LLMCallRecorder:
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+    def __observe(self, exc_type: type[BaseException] | None) -> None:
+        elapsed = time.perf_counter() - self.__started
+        labels = self.labels
+
+        LLM_CALL_SECONDS.labels(**labels).observe(elapsed)
+        LLM_FIRST_CHUNK_SECONDS.labels(**labels).observe(
+            elapsed if self.__first_chunk is None else self.__first_chunk,
+        )
+        LLM_RETRIES.labels(**labels).observe(max(self.attempts - 1, 0))
+        if self.prompt_tokens is not None:
+            LLM_PROMPT_TOKENS.labels(**labels).observe(self.prompt_tokens)
+        if self.completion_tokens is not None:
+            LLM_COMPLETION_TOKENS.labels(**labels).observe(self.completion_tokens)
+        if exc_type is not None:
+            LLM_ERRORS.labels(**labels, error=exc_type.__name__).inc()
+
+        logger.info(
+            "LLM call %s on %s/%s took %.2fs, used prompt=%s completion=%s cached=%s tokens",
+            labels["call"],
+            labels["provider"],
+            labels["model"],
+            elapsed,
+            self.prompt_tokens,
+            self.completion_tokens,
+            self.cached_tokens,
+        )
+        if elapsed >= config.LLM_SLOW_CALL_SECONDS:
+            logger.warning(
+                "Slow LLM call %s on %s/%s took %.2fs with prompt of %d chars / %s tokens",
+                labels["call"],
+                labels["provider"],
+                labels["model"],
+                elapsed,
+                self.prompt_chars,
+                self.prompt_tokens,
+            )
+
+
+def observe_llm_call(
+    provider: str,
+    model: str,
+    call: str,
+    prompt_chars: int = 0,
+) -> LLMCallRecorder:
+    return LLMCallRecorder(
+        provider=provider,
+        model=model,
+        call=call,
+        prompt_chars=prompt_chars,
+    )
+
+
+def count_llm_attempt(*_args: Any, **_kwargs: Any) -> None:
+    """Instructor `completion:kwargs` hook, fired once per attempt."""
+    recorder = current_llm_call.get()
+    if recorder is not None:
+        recorder.attempts += 1
+
+
+metrics_app = make_asgi_app()
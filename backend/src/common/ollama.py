@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+
+from src.app_logger.custom_logger import logger
+from src.common.metrics import LLM_COLD_START_CALLS, current_llm_call
+
+
+class OllamaWarmer:
+    """Keeps the local Ollama models loaded.
+
+    Ollama unloads a model after it has been idle for its `keep_alive`, and
+    the next request then pays several seconds to load it again. Once
+    started, the warmer loads the given models and pings them periodically
+    with `keep_alive`, so they stay resident between bursts of traffic.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        keep_alive: str,
+        ping_interval: float,
+    ) -> None:
+        self.models: list[str] = []
+        self.keep_alive = keep_alive
+        self.ping_interval = ping_interval
+        self.loaded: set[str] = set()
+        self.__client = httpx.AsyncClient(base_url=base_url, timeout=120)
+        self.__task: asyncio.Task | None = None
+
+    async def is_loaded(self) -> bool:
+        """Ask Ollama whether all the warmed models are loaded in memory."""
+        try:
+            response = await self.__client.get("/api/ps", timeout=2)
+            response.raise_for_status()
+        except httpx.HTTPError as err:
+            logger.warning("Could not reach Ollama: %r", err)
+            self.loaded.clear()
+            return False
+
+        running = {
+            name
+            for model in response.json().get("models") or []
+            for name in (model.get("name"), model.get("model"))
+        }
+        self.loaded = running.intersection(self.models)
+        return self.loaded.issuperset(self.models)
+
+    async def warm_up(self, model: str) -> None:
+        """Load `model`, or extend its keep-alive if it is already loaded.
+
+        A generate request without a prompt only loads the model.
+        """
+        started = time.perf_counter()
+        try:
+            response = await self.__client.post(
+                "/api/generate",
+                json={"model": model, "keep_alive": self.keep_alive},
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as err:
+            logger.warning("Could not warm up %s: %r", model, err)
+            self.loaded.discard(model)
+            return
+
+        if model not in self.loaded:
+            logger.info("Loaded %s in %.2fs", model, time.perf_counter() - started)
+        self.loaded.add(model)
+
+    async def __run(self) -> None:
+        while True:
+            await self.is_loaded()
+            # One at a time, Ollama loads models sequentially anyway
+            for model in self.models:
+                await self.warm_up(model)
+            await asyncio.sleep(self.ping_interval)
+
+    def start(self, models: list[str]) -> None:
+        """Keep `models` loaded, the ones calls are routed to."""
+        if self.__task is None:
+            self.models = models
+            self.__task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+        await self.__client.aclose()
+
+    def count_call(self, model: str) -> None:
+        """Count a call to `model` as a cold start if it is not known to be loaded."""
+        if model in self.loaded:
+            return
+
+        recorder = current_llm_call.get()
+        LLM_COLD_START_CALLS.labels(
+            provider="ollama",
+            model=model,
+            call=recorder.labels["call"] if recorder is not None else "unknown",
+        ).inc()
@@ -0,0 +1,555 @@
+from __future__ import annotations
+
+import inspect
+import json
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, TypeVar
+
+import instructor
+from pydantic import BaseModel, create_model
+
+from src.common.metrics import count_llm_attempt
+from src.common.ollama import OllamaWarmer
+from src.config import get_settings
+
+config = get_settings()
+
+T = TypeVar("T", bound=BaseModel)
+
+# Default models per provider: "small" and "large" for the agent's tool
+# calls, "structured" for LLMService's structured output. Each one can be
+# overridden with `<PROVIDER>_<KIND>_MODEL`, e.g. OLLAMA_SMALL_MODEL. The
+# Ollama agent models need tool calling support, which gemma3 does not have.
+PROVIDER_MODELS = {
+    "fake": {"small": "fake", "large": "fake", "structured": "fake"},
+    "gemini": {
+        "small": "gemini-2.0-flash-lite",
+        "large": "gemini-2.0-flash",
+        "structured": "gemini-2.0-flash-lite",
+    },
+    "bedrock": {
+        "small": "anthropic.claude-3-haiku-20240307-v1:0",
+        "large": "anthropic.claude-3-5-sonnet-20240620-v1:0",
+        "structured": "anthropic.claude-3-haiku-20240307-v1:0",
+    },
+    "ollama": {
+        "small": "qwen2.5:7b",
+        "large": "qwen2.5:14b",
+        "structured": "gemma3:12b",
+    },
+}
+
+
+def provider_models(name: str) -> dict[str, str]:
+    """Return the models of provider `name` by kind, with overrides applied."""
+    return {
+        kind: getattr(config, f"{name.upper()}_{kind.upper()}_MODEL", "") or model
+        for kind, model in PROVIDER_MODELS[name].items()
+    }
+
+
+@dataclass
+class ToolCall:
+    """A tool the model asked to call, with its parsed arguments."""
+
+    name: str
+    args: dict[str, Any]
+
+
+@dataclass
+class Generation:
+    """Provider neutral model output.
+
+    `raw` is the provider's own response, kept for token accounting.
+    """
+
+    text: str | None = None
+    tool_calls: list[ToolCall] = field(default_factory=list)
+    raw: Any = None
+
+
+def tool_parameters(tool: Callable) -> dict[str, Any]:
+    """Return the JSON schema of a tool's parameters, from its signature."""
+    fields = {
+        name: (parameter.annotation, ...)
+        for name, parameter in inspect.signature(tool).parameters.items()
+    }
+    return create_model(f"{tool.__name__}_parameters", **fields).model_json_schema()  # type: ignore[call-overload]
+
+
+class LLMProvider(ABC):
+    """One interface over the model backends the app can talk to.
+
+    Covers plain and tool-calling generation, streaming and structured
+    output, so callers such as `TransactionAgent` and `LLMService` do not
+    depend on any one SDK. Tool calls are always forced: a tool-calling
+    request returns only tool calls.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.models = provider_models(name)
+        self.__instructor_client = None
+
+    @abstractmethod
+    async def generate(
+        self,
+        model: str,
+        contents: str,
+        instruction: str,
+        temperature: float = 0,
+        tools: list[Callable] | None = None,
+        cached_content: str | None = None,
+    ) -> Generation:
+        """Return the model's text, or its tool calls when `tools` are given."""
+
+    async def stream(
+        self,
+        model: str,
+        contents: str,
+        instruction: str,
+        temperature: float = 0,
+        tools: list[Callable] | None = None,
+        cached_content: str | None = None,
+    ) -> AsyncIterator[Generation]:
+        """Stream the response; tool calls are only yielded once complete."""
+        yield await self.generate(
+            model=model,
+            contents=contents,
+            instruction=instruction,
+            temperature=temperature,
+            tools=tools,
+            cached_content=cached_content,
+        )
+
+    @abstractmethod
+    def create_instructor_client(self) -> Any:
+        """Wrap the provider's client with instructor for structured output."""
+
+    async def structured(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        response_model: type[T],
+        max_retries: int = 1,
+    ) -> tuple[T, Any]:
+        """Return (response, raw completion) validated against `response_model`.
+
+        Raises:
+            InstructorRetryException: If the output is still invalid after
+                `max_retries` attempts
+
+        """
+        if self.__instructor_client is None:
+            self.__instructor_client = self.create_instructor_client()
+            # Count attempts so re-asks show up per call in the metrics
+            self.__instructor_client.on("completion:kwargs", count_llm_attempt)
+        return await self.__instructor_client.chat.completions.create_with_completion(
+            model=model,
+            messages=messages,
+            response_model=response_model,
+            max_retries=max_retries,
+        )
+
+    async def create_context_cache(
+        self,
+        model: str,
+        instruction: str,
+        tools: list[Callable],
+        ttl: int,
+    ) -> str | None:
+        """Cache the instruction and tools provider side, if supported."""
+        return None
+
+
+class GeminiProvider(LLMProvider):
+    """Gemini through `google.genai`, also used with the offline fake client."""
+
+    def __init__(self, name: str = "gemini") -> None:
+        super().__init__(name)
+        from google.genai import types
+
+        if name == "fake":
+            from src.common.fake_llm import FakeGenaiClient
+
+            self.client = FakeGenaiClient()
+        else:
+            from google import genai
+
+            self.client = genai.Client(
+                api_key=config.GCP_KEY,
+                http_options=types.HttpOptions(base_url=config.GEMINI_BASE_URL)
+                if config.GEMINI_BASE_URL
+                else None,
+            )
+
+        self.types = types
+        self.automatic_function_calling = types.AutomaticFunctionCallingConfig(
+            disable=True,
+        )
+        self.tool_config = types.ToolConfig(
+            function_calling_config=types.FunctionCallingConfig(
+                mode=types.FunctionCallingConfigMode.ANY,
+            ),
+        )
+
+    def __config(
+        self,
+        instruction: str,
+        temperature: float,
+        tools: list[Callable] | None,
+        cached_content: str | None,
+    ):
+        types = self.types
+        if cached_content is not None:
+            # Instruction, tools and tool config all live in the cached content
+            return types.GenerateContentConfig(
+                cached_content=cached_content,
+                automatic_function_calling=self.automatic_function_calling,
+                temperature=temperature,
+            )
+
+        if not tools:
+            return types.GenerateContentConfig(
+                temperature=temperature,
+                system_instruction=instruction,
+            )
+
+        return types.GenerateContentConfig(
+            tools=tools,  # type: ignore[arg-type]
+            tool_config=self.tool_config,
+            automatic_function_calling=self.automatic_function_calling,
+            temperature=temperature,
+            system_instruction=instruction,
+        )
+
+    @staticmethod
+    def __generation(response) -> Generation:
+        tool_calls = []
+        text_parts = []
+        for candidate in (response.candidates or [])[:1]:
+            if candidate.content is None:
+                continue
+            for part in candidate.content.parts or []:
+                if part.function_call is not None:
+                    tool_calls.append(
+                        ToolCall(
+                            name=part.function_call.name or "",
+                            args=dict(part.function_call.args or {}),
+                        ),
+                    )
+                elif part.text:
+                    text_parts.append(part.text)
+
+        return Generation(
+            text="".join(text_parts) or None,
+            tool_calls=tool_calls,
+            raw=response,
+        )
+
+    async def generate(
+        self,
+        model: str,
+        contents: str,
+        instruction: str,
+        temperature: float = 0,
+        tools: list[Callable] | None = None,
+        cached_content: str | None = None,
+    ) -> Generation:
+        response = await self.client.aio.models.generate_content(
+            model=model,
+            contents=[contents],
+            config=self.__config(instruction, temperature, tools, cached_content),
+        )
+        return self.__generation(response)
+
+    async def stream(
+        self,
+        model: str,
+        contents: str,
+        instruction: str,
+        temperature: float = 0,
+        tools: list[Callable] | None = None,
+        cached_content: str | None = None,
+    ) -> AsyncIterator[Generation]:
+        response = await self.client.aio.models.generate_content_stream(
+            model=model,
+            contents=[contents],
+            config=self.__config(instruction, temperature, tools, cached_content),
+        )
+        async for chunk in response:
+            yield self.__generation(chunk)
+
+    def create_instructor_client(self) -> Any:
+        if self.name == "fake":
+            from src.common.fake_llm import FakeInstructorClient
+
+            return FakeInstructorClient()
+        return instructor.from_genai(
+            client=self.client,  # type: ignore[arg-type]
+            mode=instructor.Mode.GENAI_STRUCTURED_OUTPUTS,
+            use_async=True,
+        )
+
+    async def create_context_cache(
+        self,
+        model: str,
+        instruction: str,
+        tools: list[Callable],
+        ttl: int,
+    ) -> str | None:
+        if self.name == "fake":
+            # The fake client has no provider side caches
+            return None
+
+        types = self.types
+        cache = await self.client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=instruction,
+                tools=[
+                    types.Tool(
+                        function_declarations=[
+                            types.FunctionDeclaration.from_callable(
+                                client=self.client,  # type: ignore[arg-type]
+                                callable=tool,
+                            )
+                            for tool in tools
+                        ],
+                    ),
+                ],
+                tool_config=self.tool_config,
+                ttl=f"{ttl}s",
+            ),
+        )
+        return cache.name
+
+
+ollama_warmer = OllamaWarmer(
+    base_url=config.OLLAMA_BASE_URL,
+    keep_alive=config.OLLAMA_KEEP_ALIVE,
+    ping_interval=config.OLLAMA_KEEP_ALIVE_PING_SECONDS,
+)
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Any OpenAI compatible chat completions API, local Ollama by default."""
+
+    def __init__(
+        self,
+        name: str = "ollama",
+        base_url: str = f"{config.OLLAMA_BASE_URL}/v1",
+        api_key: str = "ollama",  # required, but unused by Ollama
+    ) -> None:
+        super().__init__(name)
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(base_url=base_url, api_key=api_key)
+
+    def create_instructor_client(self) -> Any:
+        return instructor.from_openai(self.client, mode=instructor.Mode.JSON)
+
+    def __count_cold_start(self, model: str) -> None:
+        if self.name == "ollama":
+            ollama_warmer.count_call(model)
+
+    async def structured(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        response_model: type[T],
+        max_retries: int = 1,
+    ) -> tuple[T, Any]:
+        self.__count_cold_start(model)
+        return await super().structured(model, messages, response_model, max_retries)
+
+    @staticmethod
+    def __tools(tools: list[Callable]) -> list[dict]:
+        return [
+            {
+                "type": "function",
+                "function": {
+                    "name": tool.__name__,
+                    "description": inspect.getdoc(tool) or "",
+                    "parameters": tool_parameters(tool),
+                },
+            }
+            for tool in tools
+        ]
+
+    def __request(
+        self,
+        model: str,
+        contents: str,
+        instruction: str,
+        temperature: float,
+        tools: list[Callable] | None,
+    ) -> dict[str, Any]:
+        request: dict[str, Any] = {
+            "model": model,
+            "temperature": temperature,
+            "messages": [
+                {"role": "system", "content": instruction},
+                {"role": "user", "content": contents},
+            ],
+        }
+        if tools:
+            request["tools"] = self.__tools(tools)
+            request["tool_choice"] = "required"
+        return request
+
+    async def generate(
+        self,
+        model: str,
+        contents: str,
+        instruction: str,
+        temperature: float = 0,
+        tools: list[Callable] | None = None,
+        cached_content: str | None = None,
+    ) -> Generation:
+        self.__count_cold_start(model)
+        response = await self.client.chat.completions.create(
+            **self.__request(model, contents, instruction, temperature, tools),
+        )
+        message = response.choices[0].message
+        return Generation(
+            text=message.content,
+            tool_calls=[
+                ToolCall(
+                    name=tool_call.function.name,
+                    args=json.loads(tool_call.function.arguments or "{}"),
+                )
+                for tool_call in message.tool_calls or []
+            ],
+            raw=response,
+        )
+
+    async def stream(
+        self,
+        model: str,
+        contents: str,
+        instruction: str,
+        temperature: float = 0,
+        tools: list[Callable] | None = None,
+        cached_content: str | None = None,
+    ) -> AsyncIterator[Generation]:
+        self.__count_cold_start(model)
+        response = await self.client.chat.completions.create(
+            **self.__request(model, contents, instruction, temperature, tools),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        text_parts: list[str] = []
+        # Tool call index -> [name, argument fragments]
+        partial_calls: dict[int, list] = {}
+        last_chunk = None
+        async for chunk in response:
+            last_chunk = chunk
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                if not tools:
+                    yield Generation(text=delta.content, raw=chunk)
+                text_parts.append(delta.content)
+            for tool_call in delta.tool_calls or []:
+                partial = partial_calls.setdefault(tool_call.index, ["", []])
+                if tool_call.function is None:
+                    continue
+                if tool_call.function.name:
+                    partial[0] = tool_call.function.name
+                if tool_call.function.arguments:
+                    partial[1].append(tool_call.function.arguments)
+
+        if tools:
+            yield Generation(
+                text="".join(text_parts) or None,
+                tool_calls=[
+                    ToolCall(name=name, args=json.loads("".join(arguments) or "{}"))
+                    for _, (name, arguments) in sorted(partial_calls.items())
+                ],
+                raw=last_chunk,
+            )
+
+
+class BedrockProvider(LLMProvider):
+    """Anthropic models on Bedrock."""
+
+    def __init__(self, name: str = "bedrock") -> None:
+        super().__init__(name)
+        from anthropic import AsyncAnthropicBedrock
+
+        self.client = AsyncAnthropicBedrock(
+            aws_access_key=config.AWS_KEY,
+            aws_secret_key=config.AWS_SECRET_KEY,
+            aws_region="ap-northeast-1",
+            base_url=config.BEDROCK_BASE_URL or None,
+        )
+
+    def create_instructor_client(self) -> Any:
+        return instructor.from_anthropic(self.client)
+
+    async def generate(
+        self,
+        model: str,
+        contents: str,
+        instruction: str,
+        temperature: float = 0,
+        tools: list[Callable] | None = None,
+        cached_content: str | None = None,
+    ) -> Generation:
+        request: dict[str, Any] = {}
+        if tools:
+            request["tools"] = [
+                {
+                    "name": tool.__name__,
+                    "description": inspect.getdoc(tool) or "",
+                    "input_schema": tool_parameters(tool),
+                }
+                for tool in tools
+            ]
+            request["tool_choice"] = {"type": "any"}
+
+        response = await self.client.messages.create(
+            model=model,
+            max_tokens=2000,
+            temperature=temperature,
+            system=instruction,
+            messages=[{"role": "user", "content": contents}],
+            **request,
+        )
+        return Generation(
+            text="".join(
+                block.text for block in response.content if block.type == "text"
+            )
+            or None,
+            tool_calls=[
+                ToolCall(name=block.name, args=dict(block.input))  # type: ignore[arg-type]
+                for block in response.content
+                if block.type == "tool_use"
+            ],
+            raw=response,
+        )
+
+
+def create_provider(name: str) -> LLMProvider:
+    """Build the provider called `name`."""
+    if name in ("gemini", "fake"):
+        return GeminiProvider(name)
+    if name == "bedrock":
+        return BedrockProvider()
+    if name == "ollama":
+        return OpenAICompatibleProvider()
+
+    msg = f"Unknown LLM provider {name}"
+    raise ValueError(msg)
+
+
+@lru_cache
+def get_llm_provider(name: str) -> LLMProvider:
+    """Return the provider called `name`, shared for the app lifetime."""
+    return create_provider(name)
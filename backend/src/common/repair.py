@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import re
+from datetime import datetime
+from typing import Any, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+T = TypeVar("T", bound=BaseModel)
+
+FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)\s*```", flags=re.DOTALL)
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([\]}])")
+AMOUNT_PATTERN = re.compile(r"[-+]?\d[\d,]*(?:\.\d+)?")
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d", "%Y%m%d", "%d %B %Y", "%d %b %Y")
+
+
+class RepairError(ValueError):
+    """Raised when model output could not be repaired locally."""
+
+
+def extract_json(text: str) -> str:
+    """Return the JSON document embedded in model output.
+
+    Strips markdown fences and any prose around the outermost array or
+    object.
+    """
+    fenced = FENCE_PATTERN.search(text)
+    if fenced is not None:
+        text = fenced.group(1)
+
+    starts = [index for index in (text.find("["), text.find("{")) if index != -1]
+    if not starts:
+        return text.strip()
+
+    start = min(starts)
+    end = text.rfind("]" if text[start] == "[" else "}")
+    return text[start : end + 1] if end > start else text[start:]
+
+
+def repair_json(text: str) -> Any:
+    """Parse near-valid JSON from a model.
+
+    Handles markdown fences, surrounding prose, trailing commas and smart
+    quotes.
+
+    Raises:
+        RepairError: If the text is still not valid JSON after repair
+
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    candidate = extract_json(text).translate(SMART_QUOTES)
+    candidate = TRAILING_COMMA_PATTERN.sub(r"\1", candidate)
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError as err:
+        msg = f"Could not repair JSON: {err}"
+        raise RepairError(msg) from err
+
+
+def coerce_amount(value: Any) -> Any:
+    """Turn amounts like "$1,234.50" or "SGD 5" into floats."""
+    if not isinstance(value, str):
+        return value
+
+    match = AMOUNT_PATTERN.search(value)
+    if match is None:
+        return value
+    return float(match.group(0).replace(",", ""))
+
+
+def coerce_date(value: Any) -> Any:
+    """Turn common date spellings and ISO datetimes into YYYY-MM-DD."""
+    if not isinstance(value, str):
+        return value
+
+    value = value.strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime("%Y-%m-%d")  # noqa: DTZ007
+        except ValueError:
+            continue
+
+    try:
+        return datetime.fromisoformat(value).strftime("%Y-%m-%d")
+    except ValueError:
+        return value
+
+
+def coerce_fields(data: Any) -> Any:
+    """Coerce `amount` and `date` fields anywhere in parsed model output."""
+    if isinstance(data, list):
+        return [coerce_fields(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+
+    coerced = {}
+    for key, value in data.items():
+        if key == "amount":
+            coerced[key] = coerce_amount(value)
+        elif key == "date":
+            coerced[key] = coerce_date(value)
+        else:
+            coerced[key] = coerce_fields(value)
+    return coerced
+
+
+def completion_text(completion: Any) -> str | None:
+    """Return the raw text of a provider completion, if there is any."""
+    choices = getattr(completion, "choices", None)
+    if choices:
+        message = choices[0].message
+        if getattr(message, "tool_calls", None):
+            return message.tool_calls[0].function.arguments
+        return message.content
+
+    content = getattr(completion, "content", None)
+    if isinstance(content, list):
+        for block in content:
+            if getattr(block, "type", None) == "tool_use":
+                return json.dumps(block.input)
+            if getattr(block, "type", None) == "text":
+                return block.text
+
+    return getattr(completion, "text", None)
+
+
+def repair_model(text: str, validator: type[T]) -> T:
+    """Validate near-valid model output against `validator`.
+
+    Raises:
+        RepairError: If the output could not be repaired into a valid model
+
+    """
+    data = coerce_fields(repair_json(text))
+    try:
+        return validator.model_validate(data)
+    except ValidationError as err:
+        msg = f"Repaired output does not match {validator.__name__}"
+        raise RepairError(msg) from err
@@ -8,9 +8,86 @@ class Settings(BaseSettings):
     AWS_SECRET_KEY: str = ""
     USE_GEMINI: bool = False
     USE_BEDROCK: bool = False
+    USE_FAKE_LLM: bool = False
     PREFILL_TABLES: bool = True
+    REDIS_URL: str = "redis://localhost:6379/0"
+    # Per pool and process. Each followed job or user event stream holds one
+    # connection while it blocks, however many SSE clients follow it, so this
+    # must cover the streams followed at once plus regular request traffic
+    REDIS_MAX_CONNECTIONS: int = 512
+    REDIS_POOL_TIMEOUT_SECONDS: float = 5
+    # Must stay above the longest blocking read (XREAD / XREADGROUP BLOCK)
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 10
+    REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS: float = 2
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS: int = 30
     PYTHONPATH: str = ""
     GCP_KEY: str = ""
+    LLM_MAX_CONCURRENCY: int = 32
+    OLLAMA_BASE_URL: str = "http://localhost:11434"
+    OLLAMA_WARM_UP: bool = True
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    OLLAMA_KEEP_ALIVE_PING_SECONDS: int = 240
+    GEMINI_BASE_URL: str = ""
+    BEDROCK_BASE_URL: str = ""
+    LLM_ROUTER_PROVIDERS: str = ""  # e.g. "ollama,gemini,bedrock", in priority order
+    LLM_DEADLINE_SECONDS: float = 30
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = 5
+    LLM_HEALTH_WINDOW: int = 50
+    LLM_UNHEALTHY_ERROR_RATE: float = 0.5
+    GEMINI_CONTEXT_CACHE: bool = True
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS: int = 4096
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS: int = 600
+    GEMINI_CONTEXT_CACHE_MAX_ENTRIES: int = 256
+    LLM_SLOW_CALL_SECONDS: float = 5.0
+    JOB_COALESCE_WINDOW_SECONDS: int = 5
+    SSE_DISCONNECT_CHECK_SECONDS: float = 1.0
+    SSE_HEARTBEAT_SECONDS: float = 15
+    # Events a user events client may fall behind by before it is dropped
+    USER_EVENTS_CLIENT_BUFFER: int = 256
+    # "redis", or "memory" to run jobs and keep their events, status,
+    # cancellation and coalescing inside the web process, without Redis
+    JOB_EVENT_BROKER: str = "redis"
+    JOB_STREAM_MAXLEN: int = 1000
+    JOB_STREAM_TTL_SECONDS: int = 600
+    JOB_STREAM_DONE_TTL_SECONDS: int = 120
+    JOB_STATUS_TTL_SECONDS: int = 3600
+    # Cancel a job once no SSE client has followed it for the grace period
+    JOB_CANCEL_ON_DISCONNECT: bool = True
+    JOB_CANCEL_GRACE_SECONDS: float = 10
+    INFERENCE_QUEUE_KEY: str = "queue:inference"
+    INFERENCE_QUEUE_GROUP: str = "inference-workers"
+    INFERENCE_QUEUE_VISIBILITY_TIMEOUT_SECONDS: float = 60
+    INFERENCE_QUEUE_MAX_ATTEMPTS: int = 3
+    INFERENCE_QUEUE_MAX_DEPTH: int = 1000
+    INFERENCE_WORKER_PROCESSES: int = 1
+    INFERENCE_WORKER_CONCURRENCY: int = 8
+    INFERENCE_WORKER_METRICS_PORT: int = 9100
+    SPECULATIVE_CATEGORY_SUGGESTION: bool = False
+    AGENT_PROVIDER: str = ""  # like LLM_ROUTER_PROVIDERS, which it defaults to
+    # Per provider model overrides, see PROVIDER_MODELS for the defaults
+    GEMINI_SMALL_MODEL: str = ""
+    GEMINI_LARGE_MODEL: str = ""
+    GEMINI_STRUCTURED_MODEL: str = ""
+    BEDROCK_SMALL_MODEL: str = ""
+    BEDROCK_LARGE_MODEL: str = ""
+    BEDROCK_STRUCTURED_MODEL: str = ""
+    OLLAMA_SMALL_MODEL: str = ""
+    OLLAMA_LARGE_MODEL: str = ""
+    OLLAMA_STRUCTURED_MODEL: str = ""
+    AGENT_ROUTER_MAX_SIMPLE_CHARS: int = 80
+    AGENT_ROUTER_MAX_SIMPLE_AMOUNTS: int = 1
+    INFERENCE_CHUNK_MAX_CHARS: int = 1500
+    INFERENCE_CHUNK_OVERLAP_LINES: int = 1
+    INFERENCE_CHUNK_CONCURRENCY: int = 4
+    FAKE_LLM_LATENCY_DISTRIBUTION: str = "lognormal"  # fixed/normal/lognormal/exponential
+    FAKE_LLM_LATENCY_MEAN_MS: float = 800
+    FAKE_LLM_LATENCY_STDDEV_MS: float = 300
+    FAKE_LLM_FAILURE_RATE: float = 0.0
+    FAKE_LLM_SEED: int | None = None
+    CATEGORY_SUGGEST_CACHE_BACKEND: str = "memory"  # memory/redis
+    CATEGORY_SUGGEST_CACHE_TTL_SECONDS: int = 60 * 60 * 24
+    CATEGORY_SUGGEST_CACHE_MAX_ENTRIES: int = 512
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,23 +1,38 @@
+from contextlib import asynccontextmanager
 from typing import Annotated
 
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.account.router import router as account
 from src.app_logger.custom_logger import logger
 from src.category.router import router as category
+from src.common.llm import ollama_models, uses_ollama
+from src.common.metrics import metrics_app
+from src.common.providers import ollama_warmer
 from src.config import Settings, get_settings
+from src.redis_client import close_redis_pools, ping_redis, redis_required
 from src.transaction.router import router as transaction
 from src.user.router import router as user
 
 logger.info("FastAPI application is starting...")
 
 
-app = FastAPI(debug=True)
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    if uses_ollama() and get_settings().OLLAMA_WARM_UP:
+        ollama_warmer.start(ollama_models())
+    yield
+    await ollama_warmer.stop()
+    await close_redis_pools()
+
+
+app = FastAPI(debug=True, lifespan=lifespan)
 app.include_router(transaction)
 app.include_router(category)
 app.include_router(account)
 app.include_router(user)
+app.mount("/metrics", metrics_app)
 
 origins = [
     "*",
@@ -40,3 +55,30 @@ def read_root():
 @app.get("/info")
 async def info(settings: Annotated[Settings, Depends(get_settings)]):
     return settings
+
+
+@app.get("/health")
+async def health(response: Response):
+    """Report whether the app can reach Redis, if it needs it."""
+    redis_ok = await ping_redis()
+    if not redis_ok and redis_required():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"redis": redis_ok}
+
+
+@app.get("/ready")
+async def ready(response: Response):
+    """Report readiness: Redis is reachable if needed and Ollama models are loaded."""
+    redis_ok = await ping_redis()
+    readiness: dict = {"redis": redis_ok}
+    if uses_ollama():
+        readiness["models"] = ollama_warmer.models
+        readiness["model_loaded"] = await ollama_warmer.is_loaded()
+
+    readiness["ready"] = (redis_ok or not redis_required()) and readiness.get(
+        "model_loaded",
+        True,
+    )
+    if not readiness["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return readiness
@@ -1,10 +1,85 @@
 import redis
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
 from redis.asyncio import Redis as AsyncRedis
 
+from src.app_logger.custom_logger import logger
+from src.common.metrics import REDIS_POOL_CONNECTIONS
+from src.config import get_settings
+
+config = get_settings()
+
+POOL_OPTIONS = {
+    "max_connections": config.REDIS_MAX_CONNECTIONS,
+    "timeout": config.REDIS_POOL_TIMEOUT_SECONDS,
+    "socket_timeout": config.REDIS_SOCKET_TIMEOUT_SECONDS,
+    "socket_connect_timeout": config.REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+    "health_check_interval": config.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+    "decode_responses": True,
+}
+
+# App-lifetime pools shared by every client. Blocking pools make callers wait
+# up to REDIS_POOL_TIMEOUT_SECONDS for a free connection instead of failing
+# when the pool is exhausted. Blocking stream reads keep their connection for
+# the whole wait, which is why the event broker shares one per stream.
+sync_pool = redis.BlockingConnectionPool.from_url(config.REDIS_URL, **POOL_OPTIONS)
+async_pool = AsyncBlockingConnectionPool.from_url(config.REDIS_URL, **POOL_OPTIONS)
+
+redis_client = redis.Redis(connection_pool=sync_pool)
+async_redis_client = AsyncRedis(connection_pool=async_pool)
+
+
+def _sync_in_use() -> int:
+    # Created connections minus the idle ones waiting in the queue
+    idle = sum(1 for connection in list(sync_pool.pool.queue) if connection is not None)
+    return len(sync_pool._connections) - idle  # noqa: SLF001
+
+
+REDIS_POOL_CONNECTIONS.labels(client="sync", state="in_use").set_function(
+    _sync_in_use,
+)
+REDIS_POOL_CONNECTIONS.labels(client="sync", state="created").set_function(
+    lambda: len(sync_pool._connections),  # noqa: SLF001
+)
+REDIS_POOL_CONNECTIONS.labels(client="async", state="in_use").set_function(
+    lambda: len(async_pool._in_use_connections),  # noqa: SLF001
+)
+REDIS_POOL_CONNECTIONS.labels(client="async", state="created").set_function(
+    lambda: len(async_pool._in_use_connections)  # noqa: SLF001
+    + len(async_pool._available_connections),  # noqa: SLF001
+)
+
+
+def redis_required() -> bool:
+    """Whether the app depends on Redis.
+
+    With `JOB_EVENT_BROKER=memory` jobs and their state stay in process, so a
+    single node only needs Redis for the optional shared suggestion cache.
+    """
+    return (
+        config.JOB_EVENT_BROKER != "memory"
+        or config.CATEGORY_SUGGEST_CACHE_BACKEND == "redis"
+    )
+
 
 def get_redis_client():
-    return redis.Redis(host="localhost", port=6379, decode_responses=True)
+    return redis_client
 
 
 def get_async_redis_client():
-    return AsyncRedis(host="localhost", port=6379, decode_responses=True)
+    return async_redis_client
+
+
+async def ping_redis() -> bool:
+    """Health check of the async pool."""
+    try:
+        return bool(await async_redis_client.ping())
+    except redis.RedisError as err:
+        logger.warning("Redis health check failed: %r", err)
+        return False
+
+
+async def close_redis_pools() -> None:
+    await async_redis_client.aclose()
+    await async_pool.disconnect()
+    redis_client.close()
+    sync_pool.disconnect()
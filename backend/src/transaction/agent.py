@@ -1,167 +1,326 @@
 # from __future__ import annotations # This breaks type hinting for agents!
+import hashlib
 import json
-from datetime import datetime, timezone
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
 
-from google import genai
-from google.genai import types
+from pydantic import ValidationError
 
 from src.account.model import AccountPublic, AccountTransfer
 from src.app_logger.custom_logger import logger
+from src.common.llm import (
+    create_llm_router,
+    get_agent_provider_names,
+    llm_semaphore,
+)
+from src.common.llm_router import LLMRouter
+from src.common.metrics import (
+    AGENT_ROUTE_OUTCOMES,
+    LLM_LOCAL_REPAIRS,
+    current_llm_call,
+)
+from src.common.providers import Generation, LLMProvider, ToolCall
+from src.common.repair import RepairError, coerce_fields, repair_json
 from src.config import get_settings
+from src.transaction.cancellation import JobCancelledError
+from src.transaction.heuristics import score_inference_complexity
 from src.transaction.model import (
     TransactionBankTransfer,
     TransactionBankTransferInformation,
     TransactionLLMCreate,
 )
+from src.transaction.prompt import BuiltPrompt, get_prompt_builder
 
 config = get_settings()
-GCP_KEY = config.GCP_KEY
 
 
 def call_function(
-    function_call: types.FunctionCall,
-    functions: types.ToolListUnion,
+    tool_call: ToolCall,
+    functions: list[Callable],
+    provider: str,
+    model: str,
 ):
-    function_name = function_call.name
-    function_args = function_call.args
+    function_name = tool_call.name
+    function_args = tool_call.args
     # Find the function object from the list based on the function name
     for func in functions:
         if func.__name__ == function_name:
-            func(**function_args)
+            try:
+                return func(**function_args)
+            except ValidationError:
+                # Amounts like "$12.50" or dates like "2025/01/31"
+                labels = {"provider": provider, "model": model, "call": function_name}
+                try:
+                    result = func(**coerce_fields(function_args))
+                except ValidationError:
+                    LLM_LOCAL_REPAIRS.labels(**labels, outcome="failed").inc()
+                    raise
+                LLM_LOCAL_REPAIRS.labels(**labels, outcome="repaired").inc()
+                return result
+    return None
 
 
 class TransactionAgent:
-    def __init__(self) -> None:
-        self.client = genai.Client(api_key=GCP_KEY)
-        self.automatic_function_calling = types.AutomaticFunctionCallingConfig(
-            disable=True,
-        )
-        self.tool_config = types.ToolConfig(
-            function_calling_config=types.FunctionCallingConfig(
-                mode=types.FunctionCallingConfigMode.ANY,
-            ),
-        )
-        self.resp_list: list[TransactionLLMCreate | TransactionBankTransfer] = []
-
-    def __format_text(self, text: str):
-        resp = self.client.models.generate_content(
-            model="gemini-2.0-flash-lite",
-            contents=[text],
-            config=types.GenerateContentConfig(
+    """Tool-calling agent shared for the lifetime of the app.
+
+    A single instance (and therefore a single provider client with its HTTP
+    connection pool) serves every request, so the agent must not keep
+    per-call state on `self`: tool calls return their result and
+    `infer_from_text` collects them locally.
+
+    Every model call goes through an `LLMRouter` over the providers in
+    `AGENT_PROVIDER` (Gemini by default), so calls are bounded by a deadline
+    and hedged or failed over onto the next provider, which can be a local
+    Ollama model or Bedrock.
+    """
+
+    def __init__(self, router: LLMRouter | None = None) -> None:
+        self.router = router or create_llm_router(get_agent_provider_names())
+        self.prompt_builder = get_prompt_builder()
+        # (provider, model, instruction hash) -> (Gemini cache name, monotonic
+        # refresh deadline), least recently used first
+        self.__context_caches: OrderedDict[tuple, tuple[str, float]] = OrderedDict()
+
+    async def __format_text(self, text: str):
+        async def request(provider: LLMProvider, model: str):
+            resp = await provider.generate(
+                model=model,
+                contents=text,
                 temperature=0,
-                system_instruction="""
-                Your task is to convert this text into an JSON array of text without any markdown.
-                Group the relevant text into its own element ex: Lunch $5 Yesterday is an element
-                You should NOT provide any introductory text or explanations.
-                """,
-            ),
-        )
+                instruction="""
+                    Your task is to convert this text into an JSON array of text without any markdown.
+                    Group the relevant text into its own element ex: Lunch $5 Yesterday is an element
+                    You should NOT provide any introductory text or explanations.
+                    """,
+            )
+            return resp, resp.raw
 
-        return resp.text
+        async with llm_semaphore:
+            resp = await self.router.call(
+                "format_text",
+                request,
+                prompt_chars=len(text),
+            )
 
-    def __infer_from_text_config(
-        self, category_list: list[str], account_list: list[AccountTransfer]
-    ):
-        today = datetime.now(tz=timezone.utc).date()
-        long_today = today.strftime("%Y-%m-%d")
-        today_name = today.strftime("%A")
+        return resp.text
 
-        tools: types.ToolListUnion = [
+    def __tools(self) -> list:
+        return [
             self.create_transaction_from_text,
             self.create_bank_transfer_from_text,
         ]
 
-        return types.GenerateContentConfig(
-            tools=tools,
-            tool_config=self.tool_config,
-            automatic_function_calling=self.automatic_function_calling,
-            temperature=0,
-            system_instruction=f"""
-            <role>
-                You are an autonomous financial data processing agent.
-                Your task is to analyze financial input strings and extract relevant information.
-            </role>
-
-            <tools>
-                You have access to the following two tools:
-
-                Tool 1: {self.create_transaction_from_text.__name__}:
-                This tool extracts information from simple financial transaction strings (e.g., "Groceries $50").
-                It outputs data in JSON format, with fields for category_name, amount, name, and date. Use this list,
-                {category_list} to help derive the category.
-                If you really do not and *ABSOLUTELY* unable to figure out the category, assign 'unknown' to it.
-
-                Tool 2: {self.create_bank_transfer_from_text.__name__}:
-                This tool extracts information from transaction strings (e.g "UOB Maybank 500").
-                It outputs data in JSON format, with fields for bank_from, bank_to, amount and date.
-                Use this account list to help derive the accounts:
-                {account_list}
-            </tools>
-
-            <objective>
-                Your Goal: Given any input string, you must determine the correct tool to use.
-                Use the appropriate tool to process the input and output ONLY the resulting JSON object.
-                You should NOT provide any introductory text or explanations.
-                If the input seems to be a bank transfer, use Tool 2.
-                If it appears to be a basic financial transaction, use Tool 1.
-            </objective>
-
-            <additional-requirements>
-                Today is {long_today} which is a {today_name} in YYYY-MM-DD,
-                convert any human readable dates to YYYY-MM-DD format.
-                If no date is provided, assume it is today.
-                Favour past dates unless specified.
-
-                The text may contain more than one financial data
-                Maintain the name casing and isolate each transaction dates
-            </additional-requirements>
-            """,
+    async def __get_cached_content(
+        self,
+        provider: LLMProvider,
+        model: str,
+        prompt: BuiltPrompt,
+    ) -> str | None:
+        """Return a Gemini context cache for the instruction, creating it if needed.
+
+        Gemini refuses to cache content below a model specific token minimum,
+        so small instructions skip explicit caching and rely on the provider's
+        implicit prefix caching instead.
+
+        Caches are keyed on a hash of the instruction, so users whose
+        instructions are identical share one. At most
+        `GEMINI_CONTEXT_CACHE_MAX_ENTRIES` are kept, expired ones are dropped.
+        """
+        if not config.GEMINI_CONTEXT_CACHE:
+            return None
+
+        if prompt.estimated_tokens < config.GEMINI_CONTEXT_CACHE_MIN_TOKENS:
+            return None
+
+        key = (
+            provider.name,
+            model,
+            hashlib.sha256(prompt.instruction.encode()).hexdigest(),
         )
+        now = time.monotonic()
+        cached = self.__context_caches.get(key)
+        if cached is not None:
+            if cached[1] > now:
+                self.__context_caches.move_to_end(key)
+                return cached[0]
+            del self.__context_caches[key]
+
+        ttl = config.GEMINI_CONTEXT_CACHE_TTL_SECONDS
+        try:
+            cache_name = await provider.create_context_cache(
+                model=model,
+                instruction=prompt.instruction,
+                tools=self.__tools(),
+                ttl=ttl,
+            )
+        except Exception as err:  # noqa: BLE001
+            logger.warning("Could not create Gemini context cache: %s", err)
+            return None
+
+        if cache_name is None:
+            return None
 
-    def infer_from_text(
+        # Refresh a little before the provider expires it
+        self.__context_caches[key] = (cache_name, now + ttl * 0.9)
+        for expired_key in [
+            cached_key
+            for cached_key, (_, deadline) in self.__context_caches.items()
+            if deadline <= now
+        ]:
+            del self.__context_caches[expired_key]
+        while len(self.__context_caches) > config.GEMINI_CONTEXT_CACHE_MAX_ENTRIES:
+            self.__context_caches.popitem(last=False)
+        return cache_name
+
+    def route_model(
         self,
         text: str,
-        category_list: list[str],
         account_list: list[AccountTransfer],
-    ):
-        formatted_text = self.__format_text(text=text)
+    ) -> tuple[str, str]:
+        """Pick the inference model size for `text`, returning (route, size).
 
-        agent_config = self.__infer_from_text_config(
-            category_list=category_list,
-            account_list=account_list,
+        Single, short items go to the cheap and fast "small" model; multi-item
+        inputs and inputs that look like transfers go to the "large" one.
+        """
+        complexity = score_inference_complexity(
+            text,
+            [account.name for account in account_list],
         )
-
-        response = self.client.models.generate_content_stream(
-            model="gemini-2.0-flash",
-            contents=[f"<transaction>{formatted_text}</transaction>"],
-            config=agent_config,
+        route = (
+            "simple"
+            if complexity.is_simple(
+                max_chars=config.AGENT_ROUTER_MAX_SIMPLE_CHARS,
+                max_amounts=config.AGENT_ROUTER_MAX_SIMPLE_AMOUNTS,
+            )
+            else "complex"
         )
+        size = "small" if route == "simple" else "large"
+        logger.info("Routed inference to the %s model (%s): %s", size, route, complexity)
+        return route, size
 
-        chunk = response.__next__()
-
-        if chunk.candidates is None:
-            return None
-
-        content = chunk.candidates[0].content
-        if content is None or getattr(content, "parts", None) is None:
-            return None
+    async def infer_from_text(
+        self,
+        text: str,
+        user_id: int,
+        category_list: list[str],
+        account_list: list[AccountTransfer],
+        on_formatted: Callable[[], Awaitable[None]] | None = None,
+        check_cancelled: Callable[[], Awaitable[None]] | None = None,
+    ) -> list[TransactionLLMCreate | TransactionBankTransfer]:
+        """Infer transactions and bank transfers from free text.
 
-        if content.parts is None:
-            return None
+        `check_cancelled` is awaited before each model call and is expected
+        to raise `JobCancelledError` to stop the inference.
+        """
+        route, size = self.route_model(text, account_list)
+        # Labelled with the preferred provider's model
+        model = self.router.providers[0].model(size)
 
-        for part in content.parts:
-            if part.function_call is None:
-                continue
+        try:
+            resp_list = await self.__infer_from_text(
+                text=text,
+                size=size,
+                user_id=user_id,
+                category_list=category_list,
+                account_list=account_list,
+                on_formatted=on_formatted,
+                check_cancelled=check_cancelled,
+            )
+        except JobCancelledError:
+            AGENT_ROUTE_OUTCOMES.labels(
+                route=route,
+                model=model,
+                outcome="cancelled",
+            ).inc()
+            raise
+        except Exception:
+            AGENT_ROUTE_OUTCOMES.labels(route=route, model=model, outcome="error").inc()
+            raise
+
+        if not resp_list:
+            outcome = "empty"
+        elif any(
+            isinstance(resp, TransactionLLMCreate)
+            and resp.category_name.lower() == "unknown"
+            for resp in resp_list
+        ):
+            outcome = "unknown_category"
+        else:
+            outcome = "ok"
+        AGENT_ROUTE_OUTCOMES.labels(route=route, model=model, outcome=outcome).inc()
+
+        return resp_list
+
+    async def __infer_from_text(
+        self,
+        text: str,
+        size: str,
+        user_id: int,
+        category_list: list[str],
+        account_list: list[AccountTransfer],
+        on_formatted: Callable[[], Awaitable[None]] | None,
+        check_cancelled: Callable[[], Awaitable[None]] | None,
+    ) -> list[TransactionLLMCreate | TransactionBankTransfer]:
+        if check_cancelled is not None:
+            await check_cancelled()
+        formatted_text = await self.__format_text(text=text)
+        if on_formatted is not None:
+            await on_formatted()
+        if check_cancelled is not None:
+            await check_cancelled()
+
+        prompt = self.prompt_builder.infer_instruction(
+            user_id=user_id,
+            category_list=category_list,
+            account_list=account_list,
+        )
+        contents = f"<transaction>{formatted_text}</transaction>"
+
+        async def request(provider: LLMProvider, model: str):
+            cached_content = await self.__get_cached_content(provider, model, prompt)
+            response = provider.stream(
+                model=model,
+                contents=contents,
+                instruction=prompt.instruction,
+                temperature=0,
+                tools=self.__tools(),
+                cached_content=cached_content,
+            )
+            try:
+                chunk = await anext(response, None)
+            finally:
+                await response.aclose()
+            recorder = current_llm_call.get()
+            if recorder is not None:
+                recorder.first_chunk()
+            return (provider.name, model, chunk), chunk.raw if chunk else None
+
+        chunk: Generation | None
+        async with llm_semaphore:
+            provider_name, model, chunk = await self.router.call(
+                "infer_from_text",
+                request,
+                size=size,
+                prompt_chars=len(prompt.instruction) + len(contents),
+            )
 
-            if agent_config.tools is None:
-                continue
+        if chunk is None:
+            return []
 
-            call_function(
-                part.function_call,
-                agent_config.tools,
+        resp_list: list[TransactionLLMCreate | TransactionBankTransfer] = []
+        for tool_call in chunk.tool_calls:
+            result = call_function(
+                tool_call,
+                self.__tools(),
+                provider=provider_name,
+                model=model,
             )
+            if result is not None:
+                resp_list.append(result)
 
-        yield from self.resp_list
+        return resp_list
 
     def create_transaction_from_text(
         self,
@@ -185,13 +344,11 @@ class TransactionAgent:
         </format>
 
         """
-        self.resp_list.append(
-            TransactionLLMCreate(
-                name=name,
-                amount=amount,
-                date=date,
-                category_name=category_name,
-            )
+        return TransactionLLMCreate(
+            name=name,
+            amount=amount,
+            date=date,
+            category_name=category_name,
         )
 
     def create_bank_transfer_from_text(
@@ -214,45 +371,81 @@ class TransactionAgent:
                 A dictionary containing the bank transfer.
         </format>
         """
-        # Append a TransactionBankTransfer to resp_list for service layer to handle
-        self.resp_list.append(
-            TransactionBankTransfer(
-                bank_from=bank_from,
-                bank_towards=bank_to,
-                amount=amount,
-                date=date,
-            )
+        # Return a TransactionBankTransfer for the service layer to handle
+        return TransactionBankTransfer(
+            bank_from=bank_from,
+            bank_towards=bank_to,
+            amount=amount,
+            date=date,
         )
 
-    def suggest_category(self, text: str, category_list: list[str]) -> None | list[str]:
-        resp = self.client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=[text],
-            config=types.GenerateContentConfig(
-                temperature=0.5,
-                system_instruction=f"""
-                You seem to have forgotten to categorize this transaction. Based on the following category list,
-                please suggest 3 possible categories for this transaction, ordered from most likely to least likely:
-
-                Category list:
-                {category_list}
-
-                You should NOT provide any introductory text or explanations.
-                Please ignore `unknown` category
-                Return your response in an JSON array of strings
-                """,
-            ),
+    async def suggest_categories(
+        self,
+        names: list[str],
+        user_id: int,
+        category_list: list[str],
+        call: str = "suggest_categories",
+    ) -> list[list[str]]:
+        """Suggest categories for several transaction names in one model call.
+
+        Returns one list of suggested category names per input name, in the
+        same order; names the model gave nothing usable for get an empty list.
+        """
+        if not names:
+            return []
+
+        prompt = self.prompt_builder.suggest_batch_instruction(
+            user_id=user_id,
+            category_list=category_list,
         )
+        contents = json.dumps(names)
 
+        async def request(provider: LLMProvider, model: str):
+            resp = await provider.generate(
+                model=model,
+                contents=contents,
+                instruction=prompt.instruction,
+                temperature=0.5,
+            )
+            return (provider.name, model, resp), resp.raw
+
+        async with llm_semaphore:
+            provider_name, model, resp = await self.router.call(
+                call,
+                request,
+                size="large",
+                prompt_chars=len(prompt.instruction) + len(contents),
+            )
+
+        empty: list[list[str]] = [[] for _ in names]
         if resp.text is None:
-            return None
+            return empty
 
         try:
-            return json.loads(resp.text)
-        except json.JSONDecodeError as err:
-            logger.exception(err)
-            return None
-
-
-def get_transaction_agent():
+            suggestions = json.loads(resp.text)
+        except json.JSONDecodeError:
+            # Usually a markdown fence or a trailing comma, not worth a re-ask
+            labels = {"provider": provider_name, "model": model, "call": call}
+            try:
+                suggestions = repair_json(resp.text)
+            except RepairError as err:
+                logger.exception(err)
+                LLM_LOCAL_REPAIRS.labels(**labels, outcome="failed").inc()
+                return empty
+            LLM_LOCAL_REPAIRS.labels(**labels, outcome="repaired").inc()
+
+        if not isinstance(suggestions, list):
+            return empty
+
+        return [
+            [name for name in suggestion if isinstance(name, str)]
+            if isinstance(suggestion, list)
+            else []
+            for suggestion in suggestions[: len(names)]
+        ] + empty[len(suggestions) :]
+
+
+@lru_cache
+def get_transaction_agent() -> TransactionAgent:
+    """Return the agent shared for the app lifetime, created on first use."""
     return TransactionAgent()
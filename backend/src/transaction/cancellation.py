@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+from abc import ABC, abstractmethod
+
+from redis.asyncio import Redis as AsyncRedis  # noqa: TC002
+
+from src.app_logger.custom_logger import logger
+from src.common.expiring import ExpiringDict
+from src.config import get_settings
+from src.redis_client import get_async_redis_client
+
+config = get_settings()
+
+
+class JobCancelledError(Exception):
+    """Raised inside a job once it has been cancelled."""
+
+
+class CancellationToken:
+    """A job's view of its cancellation flag.
+
+    Once the flag was seen set the token stays cancelled without asking
+    again.
+    """
+
+    def __init__(self, cancellation: JobCancellation, job_id: str) -> None:
+        self.cancellation = cancellation
+        self.job_id = job_id
+        self.cancelled = False
+
+    async def raise_if_cancelled(self) -> None:
+        """Raise `JobCancelledError` if the job was cancelled."""
+        if not self.cancelled:
+            self.cancelled = await self.cancellation.is_cancelled(self.job_id)
+        if self.cancelled:
+            raise JobCancelledError(self.job_id)
+
+
+class JobCancellation(ABC):
+    """Cancellation flags and SSE reader counts of jobs.
+
+    A job checks its flag between stages; work already committed stays
+    committed. Flags and counts expire `ttl_seconds` after they were set.
+    """
+
+    def __init__(self, ttl_seconds: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.__pending: set[asyncio.Task] = set()
+
+    def token(self, job_id: str) -> CancellationToken:
+        return CancellationToken(self, job_id)
+
+    @abstractmethod
+    async def cancel(self, job_id: str) -> None:
+        """Set the job's cancellation flag."""
+
+    @abstractmethod
+    async def is_cancelled(self, job_id: str) -> bool:
+        """Return whether the job's cancellation flag is set."""
+
+    @abstractmethod
+    async def attach(self, job_id: str) -> None:
+        """Count an SSE client following the job."""
+
+    @abstractmethod
+    async def release(self, job_id: str) -> int:
+        """Stop counting an SSE client, returning how many are left."""
+
+    @abstractmethod
+    async def readers(self, job_id: str) -> int:
+        """Return how many SSE clients follow the job."""
+
+    def detach(self, job_id: str, cancel_after: float | None) -> None:
+        """Stop counting a client, cancelling the job if it was the last one.
+
+        With `cancel_after` set, the job is cancelled if no client attached
+        again within that many seconds, so reconnecting clients keep their
+        job. Runs as its own task, since the caller is usually being
+        cancelled itself.
+        """
+        task = asyncio.create_task(self.__detach(job_id, cancel_after))
+        self.__pending.add(task)
+        task.add_done_callback(self.__pending.discard)
+
+    async def __detach(self, job_id: str, cancel_after: float | None) -> None:
+        if await self.release(job_id) > 0 or cancel_after is None:
+            return
+
+        await asyncio.sleep(cancel_after)
+        if await self.readers(job_id) <= 0:
+            logger.info("Cancelling job %s, no client is following it", job_id)
+            await self.cancel(job_id)
+
+
+class RedisJobCancellation(JobCancellation):
+    """Cancellation kept in Redis.
+
+    Jobs run in the workers while their SSE streams are served by the web
+    processes, so both sides meet in Redis.
+    """
+
+    def __init__(self, redis_client: AsyncRedis, ttl_seconds: int) -> None:
+        super().__init__(ttl_seconds)
+        self.redis_client = redis_client
+
+    @staticmethod
+    def key(job_id: str) -> str:
+        return f"job:{job_id}:cancel"
+
+    @staticmethod
+    def readers_key(job_id: str) -> str:
+        return f"job:{job_id}:readers"
+
+    async def cancel(self, job_id: str) -> None:
+        await self.redis_client.set(self.key(job_id), "1", ex=self.ttl_seconds)
+
+    async def is_cancelled(self, job_id: str) -> bool:
+        return bool(await self.redis_client.exists(self.key(job_id)))
+
+    async def attach(self, job_id: str) -> None:
+        key = self.readers_key(job_id)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def release(self, job_id: str) -> int:
+        return await self.redis_client.decr(self.readers_key(job_id))
+
+    async def readers(self, job_id: str) -> int:
+        return int(await self.redis_client.get(self.readers_key(job_id)) or 0)
+
+
+class InProcessJobCancellation(JobCancellation):
+    """Cancellation kept in memory, for the in-process job mode."""
+
+    def __init__(self, ttl_seconds: int) -> None:
+        super().__init__(ttl_seconds)
+        self.__cancelled: ExpiringDict[bool] = ExpiringDict()
+        self.__readers: ExpiringDict[int] = ExpiringDict()
+
+    async def cancel(self, job_id: str) -> None:
+        self.__cancelled.set(job_id, True, self.ttl_seconds)  # noqa: FBT003
+
+    async def is_cancelled(self, job_id: str) -> bool:
+        return bool(self.__cancelled.get(job_id))
+
+    async def attach(self, job_id: str) -> None:
+        self.__readers.set(job_id, await self.readers(job_id) + 1, self.ttl_seconds)
+
+    async def release(self, job_id: str) -> int:
+        readers = await self.readers(job_id) - 1
+        self.__readers.set(job_id, readers, self.ttl_seconds)
+        return readers
+
+    async def readers(self, job_id: str) -> int:
+        return self.__readers.get(job_id) or 0
+
+
+def create_job_cancellation() -> JobCancellation:
+    if config.JOB_EVENT_BROKER == "memory":
+        return InProcessJobCancellation(ttl_seconds=config.JOB_STATUS_TTL_SECONDS)
+
+    return RedisJobCancellation(
+        redis_client=get_async_redis_client(),
+        ttl_seconds=config.JOB_STATUS_TTL_SECONDS,
+    )
+
+
+job_cancellation = create_job_cancellation()
+
+
+def get_job_cancellation() -> JobCancellation:
+    return job_cancellation
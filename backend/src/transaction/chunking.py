@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from src.transaction.model import TransactionBankTransfer, TransactionLLMCreate
+
+
+def split_into_chunks(text: str, max_chars: int, overlap_lines: int) -> list[str]:
+    """Split a pasted statement into chunks at line (item) boundaries.
+
+    Each chunk holds whole lines up to roughly `max_chars`, and repeats the
+    last `overlap_lines` lines of the previous chunk so an item wrapped over
+    a line break is still seen whole by one chunk. Text that fits in one
+    chunk is returned as is.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    lines = [line for line in text.splitlines() if line.strip()]
+    chunks: list[list[str]] = [[]]
+    size = 0
+    for line in lines:
+        if chunks[-1] and size + len(line) > max_chars:
+            overlap = chunks[-1][-overlap_lines:] if overlap_lines else []
+            chunks.append(list(overlap))
+            size = sum(len(overlap_line) for overlap_line in overlap)
+        chunks[-1].append(line)
+        size += len(line)
+
+    return ["\n".join(chunk) for chunk in chunks]
+
+
+def transaction_key(transaction: TransactionLLMCreate | TransactionBankTransfer):
+    if isinstance(transaction, TransactionBankTransfer):
+        return (
+            "transfer",
+            transaction.bank_from.id,
+            transaction.bank_towards.id,
+            transaction.amount,
+            transaction.date,
+        )
+    return (
+        "transaction",
+        transaction.name.casefold(),
+        transaction.amount,
+        transaction.date,
+    )
+
+
+def merge_chunk_results(
+    chunk_results: list[list[TransactionLLMCreate | TransactionBankTransfer]],
+    overlap_lines: int,
+) -> list[TransactionLLMCreate | TransactionBankTransfer]:
+    """Merge per-chunk results in order, dropping duplicates at chunk edges.
+
+    The `overlap_lines` lines a chunk repeats from the previous one yield at
+    most that many items at its head. Those are dropped only when they match
+    the tail of the previous chunk's items in order, so genuinely repeated
+    purchases, even back to back across a chunk edge, are kept.
+    """
+    merged: list[TransactionLLMCreate | TransactionBankTransfer] = []
+    previous_keys: list = []
+    for results in chunk_results:
+        keys = [transaction_key(result) for result in results]
+        start = min(overlap_lines, len(keys), len(previous_keys))
+        while start and keys[:start] != previous_keys[-start:]:
+            start -= 1
+        merged.extend(results[start:])
+        previous_keys = keys
+    return merged
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+
+from redis.asyncio import Redis as AsyncRedis  # noqa: TC002
+
+from src.common.expiring import ExpiringDict
+from src.config import get_settings
+from src.redis_client import get_async_redis_client
+
+config = get_settings()
+
+
+class JobCoalescer(ABC):
+    """Maps a request key to the job started for it within a time window."""
+
+    def __init__(self, window_seconds: int) -> None:
+        self.window_seconds = window_seconds
+
+    @abstractmethod
+    async def claim(self, key: str, job_id: str) -> str:
+        """Claim `key` for `job_id`, returning the job that holds it.
+
+        That is `job_id` itself unless another job claimed the key within
+        the window.
+        """
+
+
+class RedisJobCoalescer(JobCoalescer):
+    """Claims as Redis keys, so requests coalesce across web processes."""
+
+    def __init__(self, redis_client: AsyncRedis, window_seconds: int) -> None:
+        super().__init__(window_seconds)
+        self.redis_client = redis_client
+
+    async def claim(self, key: str, job_id: str) -> str:
+        claimed = await self.redis_client.set(
+            key,
+            job_id,
+            nx=True,
+            ex=self.window_seconds,
+        )
+        if claimed:
+            return job_id
+
+        # None if the window expired between SET and GET, then the job is new
+        return await self.redis_client.get(key) or job_id
+
+
+class InProcessJobCoalescer(JobCoalescer):
+    """Claims kept in memory, for the in-process job mode."""
+
+    def __init__(self, window_seconds: int) -> None:
+        super().__init__(window_seconds)
+        self.__claims: ExpiringDict[str] = ExpiringDict()
+
+    async def claim(self, key: str, job_id: str) -> str:
+        running_job_id = self.__claims.get(key)
+        if running_job_id is not None:
+            return running_job_id
+
+        self.__claims.set(key, job_id, self.window_seconds)
+        return job_id
+
+
+def create_job_coalescer() -> JobCoalescer:
+    if config.JOB_EVENT_BROKER == "memory":
+        return InProcessJobCoalescer(window_seconds=config.JOB_COALESCE_WINDOW_SECONDS)
+
+    return RedisJobCoalescer(
+        redis_client=get_async_redis_client(),
+        window_seconds=config.JOB_COALESCE_WINDOW_SECONDS,
+    )
+
+
+job_coalescer = create_job_coalescer()
+
+
+def get_job_coalescer() -> JobCoalescer:
+    return job_coalescer
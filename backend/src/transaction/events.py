@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from collections import deque
+
+from redis.asyncio import Redis as AsyncRedis  # noqa: TC002
+from redis.exceptions import RedisError
+
+from src.app_logger.custom_logger import logger
+from src.config import get_settings
+from src.redis_client import get_async_redis_client
+
+config = get_settings()
+
+DONE_EVENT = "[DONE]"
+PROGRESS_PREFIX = "[PROGRESS]"
+
+
+def job_stream_key(job_id: str) -> str:
+    return f"job:{job_id}:events"
+
+
+def user_stream_key(user_id: int) -> str:
+    return f"user:{user_id}:events"
+
+
+def progress_event(progress: dict) -> str:
+    return f"{PROGRESS_PREFIX}{json.dumps(progress)}"
+
+
+def user_event(event_type: str, **payload) -> str:
+    """Encode an event of the user's stream as JSON with its `type`."""
+    return json.dumps({"type": event_type, **payload})
+
+
+def job_user_event(job_id: str, data: str) -> str:
+    """Wrap a job event for the user's stream, tagged with its job."""
+    if data == DONE_EVENT:
+        return user_event("job.done", job_id=job_id)
+    if data.startswith(PROGRESS_PREFIX):
+        return user_event(
+            "job.progress",
+            job_id=job_id,
+            progress=json.loads(data.removeprefix(PROGRESS_PREFIX)),
+        )
+    return user_event("job.transaction", job_id=job_id, transaction=json.loads(data))
+
+
+class JobEventBroker(ABC):
+    """Moves job events from the job to its SSE streams.
+
+    Events of a stream get increasing ids of the form `<n>-<m>`, which
+    readers pass back to continue after the last event they saw.
+    """
+
+    @abstractmethod
+    async def publish(self, stream: str, *events: str, done: bool = False) -> list[str]:
+        """Append `events` in order, returning their ids.
+
+        The stream expires `ttl_seconds` after the last batch, or
+        `done_ttl_seconds` after the job is done.
+        """
+
+    async def finish(self, stream: str, *events: str) -> list[str]:
+        """Publish the job's last `events` and its completion in one batch."""
+        return await self.publish(stream, *events, DONE_EVENT, done=True)
+
+    @abstractmethod
+    async def read(
+        self,
+        stream: str,
+        last_id: str,
+        block: float,
+    ) -> list[tuple[str, str]]:
+        """Return (id, data) of events after `last_id`.
+
+        Waits up to `block` seconds for one to arrive, returning an empty
+        list if none did.
+        """
+
+    @abstractmethod
+    async def latest_id(self, stream: str) -> str:
+        """Return the id of the stream's last event, to read only newer ones."""
+
+
+class _StreamWatch:
+    def __init__(self) -> None:
+        self.cursor: str | None = None
+        self.subscribers = 0
+        self.ready = asyncio.Event()
+        self.woken = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+    def wake(self) -> None:
+        self.woken.set()
+        self.woken = asyncio.Event()
+
+
+class RedisJobEventBroker(JobEventBroker):
+    """Job events on a Redis stream per job, shared by every process.
+
+    Every publish sends its events together with the stream's trim and
+    expiry as one MULTI/EXEC pipeline, so a batch costs a single round trip
+    and is applied atomically.
+
+    A blocking XREAD holds a pooled connection for as long as it waits, so
+    readers of the same stream share one watcher task doing the blocking
+    read, and fetch events themselves with non-blocking XRANGE calls. A
+    process therefore holds one connection per stream being followed, not
+    one per SSE client.
+    """
+
+    def __init__(
+        self,
+        redis_client: AsyncRedis,
+        maxlen: int,
+        ttl_seconds: int,
+        done_ttl_seconds: int,
+        watch_block_seconds: float = 1,
+    ) -> None:
+        self.redis_client = redis_client
+        self.maxlen = maxlen
+        self.ttl_seconds = ttl_seconds
+        self.done_ttl_seconds = done_ttl_seconds
+        self.watch_block_seconds = watch_block_seconds
+        self.__watches: dict[str, _StreamWatch] = {}
+
+    async def publish(self, stream: str, *events: str, done: bool = False) -> list[str]:
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            for data in events:
+                pipe.xadd(
+                    stream,
+                    {"data": data},
+                    maxlen=self.maxlen,
+                    approximate=True,
+                )
+            pipe.expire(stream, self.done_ttl_seconds if done else self.ttl_seconds)
+            results = await pipe.execute()
+        return results[:-1]
+
+    async def __watch(self, stream: str, watch: _StreamWatch) -> None:
+        """Block on the stream for its readers, waking them on new events.
+
+        Stops once a read returns with no reader left. The check and the
+        removal run without yielding, so a new reader cannot slip in between.
+        """
+        try:
+            watch.cursor = await self.latest_id(stream)
+            watch.ready.set()
+            while watch.subscribers:
+                try:
+                    response = await self.redis_client.xread(
+                        {stream: watch.cursor},
+                        count=100,
+                        block=int(self.watch_block_seconds * 1000),
+                    )
+                except RedisError as err:
+                    logger.warning("Could not watch %s: %r", stream, err)
+                    watch.wake()
+                    await asyncio.sleep(self.watch_block_seconds)
+                    continue
+
+                for _, entries in response or []:
+                    watch.cursor = entries[-1][0]
+                    watch.wake()
+        except RedisError as err:
+            logger.warning("Could not watch %s: %r", stream, err)
+        finally:
+            # Readers then fetch, and fail, on their own
+            watch.ready.set()
+            watch.wake()
+            del self.__watches[stream]
+
+    async def __range(self, stream: str, last_id: str) -> list[tuple[str, str]]:
+        entries = await self.redis_client.xrange(stream, min=f"({last_id}", count=100)
+        return [(event_id, fields["data"]) for event_id, fields in entries]
+
+    async def read(
+        self,
+        stream: str,
+        last_id: str,
+        block: float,
+    ) -> list[tuple[str, str]]:
+        watch = self.__watches.get(stream)
+        if watch is None:
+            watch = self.__watches[stream] = _StreamWatch()
+            watch.task = asyncio.create_task(self.__watch(stream, watch))
+        watch.subscribers += 1
+
+        try:
+            await watch.ready.wait()
+            # Events newer than the watcher's cursor wake it, older ones are
+            # picked up here
+            woken = watch.woken
+            events = await self.__range(stream, last_id)
+            if events:
+                return events
+
+            try:
+                await asyncio.wait_for(woken.wait(), timeout=block)
+            except TimeoutError:
+                return []
+            return await self.__range(stream, last_id)
+        finally:
+            watch.subscribers -= 1
+
+    async def latest_id(self, stream: str) -> str:
+        entries = await self.redis_client.xrevrange(stream, count=1)
+        return entries[0][0] if entries else "0-0"
+
+
+class _JobBuffer:
+    def __init__(self, maxlen: int) -> None:
+        self.events: deque[tuple[int, str]] = deque(maxlen=maxlen)
+        self.last_seq = 0
+        self.changed = asyncio.Condition()
+        self.expiry: asyncio.TimerHandle | None = None
+
+
+class InProcessJobEventBroker(JobEventBroker):
+    """Job events kept in memory, for single process deployments.
+
+    Each job gets a bounded replay buffer, so late and reconnecting readers
+    still see the last `maxlen` events. Jobs must run in the same process as
+    the SSE handlers reading them.
+    """
+
+    def __init__(self, maxlen: int, ttl_seconds: int, done_ttl_seconds: int) -> None:
+        self.maxlen = maxlen
+        self.ttl_seconds = ttl_seconds
+        self.done_ttl_seconds = done_ttl_seconds
+        self.__buffers: dict[str, _JobBuffer] = {}
+
+    def __buffer(self, stream: str) -> _JobBuffer:
+        buffer = self.__buffers.get(stream)
+        if buffer is None:
+            buffer = self.__buffers[stream] = _JobBuffer(self.maxlen)
+            self.__expire(stream, buffer, self.ttl_seconds)
+        return buffer
+
+    def __expire(self, stream: str, buffer: _JobBuffer, ttl: float) -> None:
+        if buffer.expiry is not None:
+            buffer.expiry.cancel()
+        buffer.expiry = asyncio.get_running_loop().call_later(
+            ttl,
+            self.__buffers.pop,
+            stream,
+            None,
+        )
+
+    async def publish(self, stream: str, *events: str, done: bool = False) -> list[str]:
+        buffer = self.__buffer(stream)
+        ids = []
+        for data in events:
+            buffer.last_seq += 1
+            buffer.events.append((buffer.last_seq, data))
+            ids.append(f"{buffer.last_seq}-0")
+        self.__expire(
+            stream,
+            buffer,
+            self.done_ttl_seconds if done else self.ttl_seconds,
+        )
+
+        async with buffer.changed:
+            buffer.changed.notify_all()
+        return ids
+
+    async def read(
+        self,
+        stream: str,
+        last_id: str,
+        block: float,
+    ) -> list[tuple[str, str]]:
+        after = int(last_id.split("-", 1)[0] or 0)
+        buffer = self.__buffer(stream)
+
+        if buffer.last_seq <= after:
+            async with buffer.changed:
+                try:
+                    await asyncio.wait_for(
+                        buffer.changed.wait_for(lambda: buffer.last_seq > after),
+                        timeout=block,
+                    )
+                except TimeoutError:
+                    return []
+
+        return [(f"{seq}-0", data) for seq, data in buffer.events if seq > after]
+
+    async def latest_id(self, stream: str) -> str:
+        buffer = self.__buffers.get(stream)
+        return f"{buffer.last_seq}-0" if buffer is not None else "0-0"
+
+
+class JobChannel:
+    """Publishes a job's events to its own stream and to its user's stream.
+
+    The job stream feeds the job's SSE stream, the user stream feeds the
+    user events stream multiplexing all of the user's jobs.
+    """
+
+    def __init__(self, broker: JobEventBroker, job_id: str, user_id: int) -> None:
+        self.broker = broker
+        self.job_id = job_id
+        self.stream = job_stream_key(job_id)
+        self.user_stream = user_stream_key(user_id)
+
+    async def publish(self, *events: str, done: bool = False) -> None:
+        await self.broker.publish(self.stream, *events, done=done)
+        await self.broker.publish(
+            self.user_stream,
+            *(job_user_event(self.job_id, data) for data in events),
+        )
+
+    async def finish(self, *events: str) -> None:
+        await self.publish(*events, DONE_EVENT, done=True)
+
+
+def create_job_event_broker() -> JobEventBroker:
+    if config.JOB_EVENT_BROKER == "memory":
+        return InProcessJobEventBroker(
+            maxlen=config.JOB_STREAM_MAXLEN,
+            ttl_seconds=config.JOB_STREAM_TTL_SECONDS,
+            done_ttl_seconds=config.JOB_STREAM_DONE_TTL_SECONDS,
+        )
+
+    return RedisJobEventBroker(
+        redis_client=get_async_redis_client(),
+        maxlen=config.JOB_STREAM_MAXLEN,
+        ttl_seconds=config.JOB_STREAM_TTL_SECONDS,
+        done_ttl_seconds=config.JOB_STREAM_DONE_TTL_SECONDS,
+    )
+
+
+job_event_broker = create_job_event_broker()
+
+
+def get_job_event_broker() -> JobEventBroker:
+    return job_event_broker
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+WORD_PATTERN = re.compile(r"[a-z]+")
+
+
+def predict_unknown_category(text: str, category_list: list[str]) -> bool:
+    """Cheaply guess whether the agent will fail to categorize `text`.
+
+    The agent reliably picks a category when the text mentions a word of it
+    ("fast food 12" mentions "Food & Dining"), so a text sharing no word with
+    any category name ("grab 12") is likely to end up "unknown".
+    """
+    text_words = set(WORD_PATTERN.findall(text.casefold()))
+    for category in category_list:
+        if category == "unknown":
+            continue
+        category_words = {
+            word
+            for word in WORD_PATTERN.findall(category.casefold())
+            if len(word) > 2  # noqa: PLR2004
+        }
+        if category_words & text_words:
+            return False
+    return True
+
+
+AMOUNT_PATTERN = re.compile(r"\d+(?:[.,]\d+)?")
+MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+# Dates are not amounts, "coffee 5 2024-01-05" holds one amount, not three
+DATE_PATTERN = re.compile(
+    r"\b\d{4}[-/.]\d{1,2}[-/.]\d{1,2}\b"
+    r"|\b\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}\b"
+    r"|\b\d{1,2}/\d{1,2}\b"
+    rf"|\b\d{{1,2}}(?:st|nd|rd|th)?\s+{MONTHS}(?!\w)"
+    rf"|\b{MONTHS}\s+\d{{1,2}}(?:st|nd|rd|th)?\b",
+    flags=re.IGNORECASE,
+)
+TRANSFER_WORDS = frozenset({"transfer", "transferred", "move", "moved", "topup", "top"})
+
+
+@dataclass
+class InferenceComplexity:
+    """Features of a create-by-text input used to pick the inference model."""
+
+    chars: int
+    amounts: int
+    accounts_mentioned: int
+    transfer_words: int
+
+    @property
+    def looks_like_transfer(self) -> bool:
+        return self.accounts_mentioned >= 2 or (  # noqa: PLR2004
+            self.accounts_mentioned >= 1 and self.transfer_words >= 1
+        )
+
+    def is_simple(self, max_chars: int, max_amounts: int) -> bool:
+        return (
+            not self.looks_like_transfer
+            and self.amounts <= max_amounts
+            and self.chars <= max_chars
+        )
+
+
+def score_inference_complexity(
+    text: str,
+    account_names: list[str],
+) -> InferenceComplexity:
+    lowered = text.casefold()
+    words = set(WORD_PATTERN.findall(lowered))
+    return InferenceComplexity(
+        chars=len(text),
+        amounts=len(AMOUNT_PATTERN.findall(DATE_PATTERN.sub(" ", text))),
+        accounts_mentioned=sum(
+            1 for name in account_names if name and name.casefold() in lowered
+        ),
+        transfer_words=len(words & TRANSFER_WORDS),
+    )
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import time
+from abc import ABC, abstractmethod
+
+from redis.asyncio import Redis as AsyncRedis  # noqa: TC002
+
+from src.common.expiring import ExpiringDict
+from src.config import get_settings
+from src.redis_client import get_async_redis_client
+from src.transaction.model import JobState, JobStatusPublic
+
+config = get_settings()
+
+STAGES = ("queued", "formatted", "inferred", "categorized", "persisted", "published")
+
+
+class JobStatusTracker(ABC):
+    """Keeps a record per job with its state, counts and stage timings.
+
+    Lets clients poll a job instead of holding its SSE stream open, and shows
+    where the time of a create-by-text job goes. Records expire
+    `ttl_seconds` after their last update.
+    """
+
+    def __init__(self, ttl_seconds: int) -> None:
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    async def save(self, job_id: str, mapping: dict[str, str]) -> None:
+        """Merge `mapping` into the job's record and refresh its expiry."""
+
+    @abstractmethod
+    async def load(self, job_id: str) -> dict[str, str]:
+        """Return the job's record, empty if there is none."""
+
+    async def update(
+        self,
+        job_id: str,
+        stage: str | None = None,
+        **fields: str | int,
+    ) -> None:
+        """Record `fields` and, if given, that the job reached `stage` now.
+
+        For chunked statements `formatted` is overwritten by every chunk, so
+        it ends up as the time the last chunk was formatted.
+        """
+        mapping = {name: str(value) for name, value in fields.items()}
+        if stage is not None:
+            mapping[f"{stage}_at"] = str(time.time())
+
+        await self.save(job_id, mapping)
+
+    async def is_persisted(self, job_id: str) -> bool:
+        """Return whether the job's rows were committed by an earlier attempt."""
+        return "persisted_at" in await self.load(job_id)
+
+    async def queued(self, job_id: str) -> None:
+        await self.update(job_id, "queued", state=JobState.queued.value)
+
+    async def failed(
+        self,
+        job_id: str,
+        error: str,
+        attempts: int,
+        *,
+        final: bool,
+    ) -> None:
+        state = JobState.failed if final else JobState.retrying
+        await self.update(job_id, state=state.value, error=error, attempts=attempts)
+
+    async def get(self, job_id: str) -> JobStatusPublic | None:
+        status = await self.load(job_id)
+        if not status:
+            return None
+
+        stages = {
+            stage: float(status[f"{stage}_at"])
+            for stage in STAGES
+            if f"{stage}_at" in status
+        }
+        stage_seconds = {}
+        previous = None
+        for stage, reached_at in stages.items():
+            if previous is not None:
+                stage_seconds[stage] = round(reached_at - previous, 3)
+            previous = reached_at
+
+        return JobStatusPublic(
+            job_id=job_id,
+            state=JobState(status["state"]),
+            items_inferred=status.get("items_inferred"),  # type: ignore[arg-type]
+            items_persisted=status.get("items_persisted"),  # type: ignore[arg-type]
+            attempts=status.get("attempts", 0),  # type: ignore[arg-type]
+            error=status.get("error"),
+            stages=stages,
+            stage_seconds=stage_seconds,
+        )
+
+
+class RedisJobStatusTracker(JobStatusTracker):
+    """Job records as Redis hashes, shared by the web and worker processes."""
+
+    def __init__(self, redis_client: AsyncRedis, ttl_seconds: int) -> None:
+        super().__init__(ttl_seconds)
+        self.redis_client = redis_client
+
+    @staticmethod
+    def key(job_id: str) -> str:
+        return f"job:{job_id}:status"
+
+    async def save(self, job_id: str, mapping: dict[str, str]) -> None:
+        key = self.key(job_id)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def load(self, job_id: str) -> dict[str, str]:
+        return await self.redis_client.hgetall(self.key(job_id))  # type: ignore[misc]
+
+
+class InProcessJobStatusTracker(JobStatusTracker):
+    """Job records kept in memory, for the in-process job mode."""
+
+    def __init__(self, ttl_seconds: int) -> None:
+        super().__init__(ttl_seconds)
+        self.__records: ExpiringDict[dict[str, str]] = ExpiringDict()
+
+    async def save(self, job_id: str, mapping: dict[str, str]) -> None:
+        record = {**(self.__records.get(job_id) or {}), **mapping}
+        self.__records.set(job_id, record, self.ttl_seconds)
+
+    async def load(self, job_id: str) -> dict[str, str]:
+        return dict(self.__records.get(job_id) or {})
+
+
+def create_job_status_tracker() -> JobStatusTracker:
+    if config.JOB_EVENT_BROKER == "memory":
+        return InProcessJobStatusTracker(ttl_seconds=config.JOB_STATUS_TTL_SECONDS)
+
+    return RedisJobStatusTracker(
+        redis_client=get_async_redis_client(),
+        ttl_seconds=config.JOB_STATUS_TTL_SECONDS,
+    )
+
+
+job_status_tracker = create_job_status_tracker()
+
+
+def get_job_status_tracker() -> JobStatusTracker:
+    return job_status_tracker
@@ -129,6 +129,28 @@ class NetWorthStatsDurationPublic(StatsDurationBase):
     pass
 
 
+class JobState(str, Enum):
+    queued = "queued"
+    running = "running"
+    retrying = "retrying"
+    done = "done"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+class JobStatusPublic(BaseModel):
+    job_id: str
+    state: JobState
+    items_inferred: Optional[int] = None
+    items_persisted: Optional[int] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    # Stage -> unix timestamp it was reached at
+    stages: dict[str, float]
+    # Stage -> seconds since the previous stage that was reached
+    stage_seconds: dict[str, float]
+
+
 class TransactionSA(MappedAsDataclass, Base):
     """Transaction table."""
 
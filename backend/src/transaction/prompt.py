@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from src.account.model import AccountTransfer  # noqa: TC001
+
+CREATE_TRANSACTION_TOOL = "create_transaction_from_text"
+CREATE_BANK_TRANSFER_TOOL = "create_bank_transfer_from_text"
+
+# Rough chars-per-token ratio, only used to decide whether an instruction is
+# large enough for provider-side context caching.
+CHARS_PER_TOKEN = 4
+
+
+def encode_categories(category_list: list[str]) -> str:
+    """Encode category names as a single `|` separated line.
+
+    Sorting keeps the encoding (and therefore the prompt prefix) stable no
+    matter which order the rows came back from the database.
+    """
+    return "|".join(sorted(set(category_list)))
+
+
+def encode_accounts(account_list: list[AccountTransfer]) -> str:
+    """Encode accounts as `id=name` pairs separated by `;`."""
+    return ";".join(
+        f"{account.id}={account.name}"
+        for account in sorted(account_list, key=lambda account: account.id)
+    )
+
+
+def data_version(*encoded: str) -> str:
+    """Return a short digest identifying the encoded prompt data."""
+    digest = hashlib.sha1(usedforsecurity=False)
+    for part in encoded:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+@dataclass
+class BuiltPrompt:
+    """A system instruction together with the key it was memoized under."""
+
+    key: tuple
+    instruction: str
+
+    @property
+    def estimated_tokens(self) -> int:
+        return estimate_tokens(self.instruction)
+
+
+class PromptBuilder:
+    """Builds compact system instructions and memoizes them.
+
+    Instructions are keyed by user, a digest of the category/account data they
+    embed and, for the inference prompt, today's date. A change to any of
+    those produces a new key, so stale instructions are never served; old keys
+    simply fall out of the LRU.
+    """
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self.__cache: OrderedDict[tuple, str] = OrderedDict()
+
+    def __memoize(self, key: tuple, build) -> BuiltPrompt:
+        instruction = self.__cache.get(key)
+        if instruction is None:
+            instruction = build()
+            self.__cache[key] = instruction
+            if len(self.__cache) > self.max_entries:
+                self.__cache.popitem(last=False)
+        else:
+            self.__cache.move_to_end(key)
+        return BuiltPrompt(key=key, instruction=instruction)
+
+    def infer_instruction(
+        self,
+        user_id: int,
+        category_list: list[str],
+        account_list: list[AccountTransfer],
+        today: date | None = None,
+    ) -> BuiltPrompt:
+        today = today or datetime.now(tz=timezone.utc).date()
+        categories = encode_categories(category_list)
+        accounts = encode_accounts(account_list)
+        key = ("infer", user_id, data_version(categories, accounts), today)
+
+        return self.__memoize(
+            key,
+            lambda: self.__build_infer_instruction(categories, accounts, today),
+        )
+
+    def suggest_batch_instruction(
+        self,
+        user_id: int,
+        category_list: list[str],
+    ) -> BuiltPrompt:
+        categories = encode_categories(
+            [category for category in category_list if category != "unknown"],
+        )
+        key = ("suggest-batch", user_id, data_version(categories))
+
+        return self.__memoize(
+            key,
+            lambda: self.__build_suggest_batch_instruction(categories),
+        )
+
+    @staticmethod
+    def __build_infer_instruction(categories: str, accounts: str, today: date) -> str:
+        return f"""<role>
+You are an autonomous financial data processing agent. Analyze financial input strings and extract relevant information.
+</role>
+<tools>
+Tool 1: {CREATE_TRANSACTION_TOOL}: simple transactions (e.g. "Groceries $50"). Pick category_name from CATEGORIES; only if *ABSOLUTELY* unable, use 'unknown'.
+Tool 2: {CREATE_BANK_TRANSFER_TOOL}: transfers between accounts (e.g. "UOB Maybank 500"). Pick bank_from/bank_to from ACCOUNTS.
+CATEGORIES: {categories}
+ACCOUNTS (id=name): {accounts}
+</tools>
+<objective>
+Pick the correct tool for every financial item in the input: Tool 2 for bank transfers, Tool 1 otherwise.
+Output ONLY tool calls, no introductory text or explanations.
+</objective>
+<additional-requirements>
+Today is {today.strftime("%Y-%m-%d")} ({today.strftime("%A")}). Convert human readable dates to YYYY-MM-DD; assume today if none; favour past dates unless specified.
+The text may contain more than one financial item. Maintain the name casing and isolate each transaction date.
+</additional-requirements>"""
+
+    @staticmethod
+    def __build_suggest_batch_instruction(categories: str) -> str:
+        return f"""The input is a JSON array of uncategorized transaction names. For each name suggest 3 categories from CATEGORIES, most likely first.
+CATEGORIES: {categories}
+Return ONLY a JSON array holding one array of strings per input name, in input order. No introductory text or explanations."""
+
+
+prompt_builder = PromptBuilder()
+
+
+def get_prompt_builder() -> PromptBuilder:
+    return prompt_builder
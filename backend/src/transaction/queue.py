@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass
+
+from redis.asyncio import Redis as AsyncRedis  # noqa: TC002
+from redis.exceptions import ResponseError
+
+from src.app_logger.custom_logger import logger
+from src.common.metrics import INFERENCE_QUEUE_DEPTH
+from src.config import get_settings
+from src.redis_client import get_async_redis_client
+from src.transaction.model import TransactionLLMCreateRequest
+
+config = get_settings()
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue is at `INFERENCE_QUEUE_MAX_DEPTH`."""
+
+
+@dataclass
+class InferenceJob:
+    """A create-by-text job as delivered to a worker."""
+
+    message_id: str
+    job_id: str
+    query: TransactionLLMCreateRequest
+    attempts: int
+
+
+class InferenceQueue:
+    """Durable queue of create-by-text jobs on a Redis stream.
+
+    Workers read through a consumer group, so every job is delivered to one
+    worker and stays pending until it is acked. A job whose worker died is
+    claimed by another worker once it has been idle for the visibility
+    timeout; workers keep their running jobs fresh with `heartbeat`. Acked
+    entries are deleted, so the stream length is the queue depth.
+    """
+
+    def __init__(
+        self,
+        redis_client: AsyncRedis,
+        key: str,
+        group: str,
+        visibility_timeout: float,
+        max_attempts: int,
+        max_depth: int,
+    ) -> None:
+        self.redis_client = redis_client
+        self.key = key
+        self.dead_letter_key = f"{key}:dead"
+        self.group = group
+        self.visibility_timeout_ms = int(visibility_timeout * 1000)
+        self.max_attempts = max_attempts
+        self.max_depth = max_depth
+
+    async def ensure_group(self) -> None:
+        try:
+            await self.redis_client.xgroup_create(
+                self.key,
+                self.group,
+                id="0",
+                mkstream=True,
+            )
+        except ResponseError as err:
+            if "BUSYGROUP" not in str(err):
+                raise
+
+    async def enqueue(
+        self,
+        job_id: str,
+        query: TransactionLLMCreateRequest,
+        attempts: int = 0,
+    ) -> str:
+        """Add a job to the queue.
+
+        Raises:
+            QueueFullError: If the queue already holds `max_depth` jobs
+
+        """
+        if attempts == 0 and await self.redis_client.xlen(self.key) >= self.max_depth:
+            msg = f"Inference queue is full ({self.max_depth} jobs)"
+            raise QueueFullError(msg)
+
+        return await self.redis_client.xadd(
+            self.key,
+            {
+                "job_id": job_id,
+                "query": query.model_dump_json(),
+                "attempts": str(attempts),
+            },
+        )
+
+    @staticmethod
+    def __job(message_id: str, fields: dict) -> InferenceJob:
+        return InferenceJob(
+            message_id=message_id,
+            job_id=fields["job_id"],
+            query=TransactionLLMCreateRequest(**json.loads(fields["query"])),
+            attempts=int(fields.get("attempts", 0)),
+        )
+
+    async def claim_stale(self, consumer: str, count: int) -> list[InferenceJob]:
+        """Take over jobs whose worker stopped heartbeating."""
+        _, messages, *_ = await self.redis_client.xautoclaim(
+            self.key,
+            self.group,
+            consumer,
+            min_idle_time=self.visibility_timeout_ms,
+            count=count,
+        )
+        jobs = []
+        for message_id, fields in messages:
+            if fields is None:
+                # Deleted while pending
+                await self.redis_client.xack(self.key, self.group, message_id)
+                continue
+            job = self.__job(message_id, fields)
+            # The workers of the earlier deliveries died running the job
+            job.attempts += await self.__redeliveries(message_id)
+            logger.warning(
+                "Reclaimed stale inference job %s after %s attempts",
+                job.job_id,
+                job.attempts,
+            )
+            jobs.append(job)
+        return jobs
+
+    async def __redeliveries(self, message_id: str) -> int:
+        """Count the deliveries of a pending message after its first one."""
+        pending = await self.redis_client.xpending_range(
+            self.key,
+            self.group,
+            min=message_id,
+            max=message_id,
+            count=1,
+        )
+        return pending[0]["times_delivered"] - 1 if pending else 0
+
+    async def read(self, consumer: str, count: int, block: float) -> list[InferenceJob]:
+        """Wait up to `block` seconds for new jobs."""
+        response = await self.redis_client.xreadgroup(
+            self.group,
+            consumer,
+            {self.key: ">"},
+            count=count,
+            block=int(block * 1000),
+        )
+        return [
+            self.__job(message_id, fields)
+            for _, messages in response or []
+            for message_id, fields in messages
+        ]
+
+    async def heartbeat(self, consumer: str, job: InferenceJob) -> None:
+        """Reset the job's idle time so it is not reclaimed while running."""
+        await self.redis_client.xclaim(
+            self.key,
+            self.group,
+            consumer,
+            min_idle_time=0,
+            message_ids=[job.message_id],
+            justid=True,
+        )
+
+    async def ack(self, job: InferenceJob) -> None:
+        await self.redis_client.xack(self.key, self.group, job.message_id)
+        await self.redis_client.xdel(self.key, job.message_id)
+
+    async def retry(self, job: InferenceJob) -> bool:
+        """Requeue a failed job, or dead-letter it after `max_attempts`.
+
+        Returns:
+            True if the job was requeued
+
+        """
+        attempts = job.attempts + 1
+        if attempts >= self.max_attempts:
+            await self.dead_letter(job, attempts)
+            return False
+
+        await self.enqueue(job.job_id, job.query, attempts=attempts)
+        await self.ack(job)
+        return True
+
+    async def dead_letter(self, job: InferenceJob, attempts: int) -> None:
+        """Move a job that used up its attempts to the dead-letter stream."""
+        await self.redis_client.xadd(
+            self.dead_letter_key,
+            {
+                "job_id": job.job_id,
+                "query": job.query.model_dump_json(),
+                "attempts": str(attempts),
+            },
+        )
+        await self.ack(job)
+
+    async def record_depth(self) -> None:
+        """Update the queue depth gauges."""
+        depth, pending = await asyncio.gather(
+            self.redis_client.xlen(self.key),
+            self.redis_client.xpending(self.key, self.group),
+        )
+        in_flight = pending["pending"]
+        INFERENCE_QUEUE_DEPTH.labels(state="waiting").set(depth - in_flight)
+        INFERENCE_QUEUE_DEPTH.labels(state="in_flight").set(in_flight)
+        INFERENCE_QUEUE_DEPTH.labels(state="dead").set(
+            await self.redis_client.xlen(self.dead_letter_key),
+        )
+
+
+def create_inference_queue(redis_client: AsyncRedis | None = None) -> InferenceQueue:
+    return InferenceQueue(
+        redis_client=redis_client or get_async_redis_client(),
+        key=config.INFERENCE_QUEUE_KEY,
+        group=config.INFERENCE_QUEUE_GROUP,
+        visibility_timeout=config.INFERENCE_QUEUE_VISIBILITY_TIMEOUT_SECONDS,
+        max_attempts=config.INFERENCE_QUEUE_MAX_ATTEMPTS,
+        max_depth=config.INFERENCE_QUEUE_MAX_DEPTH,
+    )
+
+
+inference_queue = create_inference_queue()
+
+
+def get_inference_queue() -> InferenceQueue:
+    return inference_queue
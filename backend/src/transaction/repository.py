@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from random import randint
 from sqlite3 import DatabaseError
 from typing import Annotated
@@ -28,6 +28,29 @@ class TransactionRepository:
     def __init__(self, db_service: DatabaseService) -> None:
         self.db_service = db_service
 
+    @staticmethod
+    def __to_sa(
+        transaction_create: TransactionCreate,
+        suggest_categories: list[CategorySA],
+        now: datetime,
+    ) -> TransactionSA:
+        return TransactionSA(
+            user_id=transaction_create.user_id,
+            name=transaction_create.name,
+            entry_type=transaction_create.entry_type,
+            category_id=transaction_create.category_id,
+            amount=transaction_create.amount,
+            date=datetime.strptime(transaction_create.date, "%Y-%m-%d").replace(
+                tzinfo=timezone.utc,
+                hour=now.hour,
+                minute=now.minute,
+                second=now.second,
+                microsecond=now.microsecond,
+            ),
+            account_id=transaction_create.account_id,
+            suggested_categories=suggest_categories,
+        )
+
     def create_transaction(self, transaction_create: TransactionCreate):
         with SASession(bind=self.db_service.sa_engine) as session:
             suggest_categories = session.scalars(
@@ -36,119 +59,167 @@ class TransactionRepository:
                 )
             ).all()
 
-            now = datetime.now(timezone.utc)
-            transaction = TransactionSA(
-                user_id=transaction_create.user_id,
-                name=transaction_create.name,
-                entry_type=transaction_create.entry_type,
-                category_id=transaction_create.category_id,
-                amount=transaction_create.amount,
-                date=datetime.strptime(transaction_create.date, "%Y-%m-%d").replace(
-                    tzinfo=timezone.utc,
-                    hour=now.hour,
-                    minute=now.minute,
-                    second=now.second,
-                    microsecond=now.microsecond,
-                ),
-                account_id=transaction_create.account_id,
-                suggested_categories=suggest_categories,
+            transaction = self.__to_sa(
+                transaction_create,
+                list(suggest_categories),
+                datetime.now(timezone.utc),
             )
             session.add(transaction)
             session.commit()
             session.refresh(transaction)
             return transaction
 
-    def get_transaction(self, user_id: int, transaction_id: int):
+    def create_transactions(
+        self,
+        transaction_creates: list[TransactionCreate],
+    ) -> list[int]:
+        """Create several transactions in one session and one commit.
+
+        Either all of them are written or none is. Suggested categories of
+        all transactions are loaded with a single query.
+
+        Args:
+            transaction_creates: The transactions to create, in order
+
+        Returns:
+            IDs of the created transactions, in the same order
+
+        """
+        if not transaction_creates:
+            return []
+
         with SASession(bind=self.db_service.sa_engine) as session:
-            tx_with_account = (
-                select(
-                    TransactionSA.id,
-                    TransactionSA.amount,
-                    TransactionSA.date,
-                    TransactionSA.name,
-                    TransactionSA.entry_type,
-                    TransactionSA.category_id,
-                    TransactionSA.user_id,
-                    TransactionSA.account_id,
-                    AccountSA.created_at.label("account_created_at"),
-                    AccountSA.initial_balance,
-                    AccountSA.currency,
-                    AccountSA.name.label("account_name"),
-                    CategorySA.name.label("category_name"),
-                )
-                .where(
-                    TransactionSA.user_id == user_id,
-                )
-                .join(
-                    AccountSA,
-                    AccountSA.id == TransactionSA.account_id,
-                    isouter=True,
-                )
-                .join(
-                    CategorySA,
-                    CategorySA.id == TransactionSA.category_id,
-                    isouter=True,
+            suggested_ids = {
+                category_id
+                for transaction_create in transaction_creates
+                for category_id in transaction_create.suggested_categories
+            }
+            category_by_id = {
+                category.id: category
+                for category in session.scalars(
+                    select(CategorySA).where(CategorySA.id.in_(suggested_ids)),
+                ).all()
+            }
+
+            now = datetime.now(timezone.utc)
+            transactions = [
+                self.__to_sa(
+                    transaction_create,
+                    [
+                        category_by_id[category_id]
+                        for category_id in transaction_create.suggested_categories
+                        if category_id in category_by_id
+                    ],
+                    # Keep the items of a batch in order for running balances
+                    now + timedelta(microseconds=index),
                 )
-                # .subquery()
-            )
+                for index, transaction_create in enumerate(transaction_creates)
+            ]
+            session.add_all(transactions)
+            session.flush()
+            transaction_ids = [transaction.id for transaction in transactions]
+            session.commit()
+            return transaction_ids
+
+    @staticmethod
+    def __running_total_cte(user_id: int):
+        """Select the user's transactions with their account's running balance.
 
-            initial_tx = select(
-                literal(value=randint(9999, 99999)).label("id"),
-                AccountSA.initial_balance.label("amount"),
-                AccountSA.created_at.label("date"),
-                literal("Account Creation").label("name"),
-                literal("credit").label("entry_type"),
-                literal(1).label("category_id"),
-                AccountSA.user_id.label("user_id"),
-                AccountSA.id.label("account_id"),
+        Every account starts with an "Account Creation" row of its initial
+        balance, and the balance accumulates per account in date order.
+        """
+        tx_with_account = (
+            select(
+                TransactionSA.id,
+                TransactionSA.amount,
+                TransactionSA.date,
+                TransactionSA.name,
+                TransactionSA.entry_type,
+                TransactionSA.category_id,
+                TransactionSA.user_id,
+                TransactionSA.account_id,
                 AccountSA.created_at.label("account_created_at"),
-                AccountSA.initial_balance.label("initial_balance"),
-                AccountSA.currency.label("currency"),
+                AccountSA.initial_balance,
+                AccountSA.currency,
                 AccountSA.name.label("account_name"),
-                literal("Initial Balance").label("category_name"),
-            ).select_from(AccountSA)
-
-            combined_tx = initial_tx.union_all(tx_with_account).subquery()
-
-            tx = alias(combined_tx)
-
-            adjusted_amount: Case[int] = Case(
-                (
-                    tx.c.entry_type == "credit",
-                    tx.c.amount,
-                ),  # Credit adds amount
-                (
-                    tx.c.entry_type == "debit",
-                    -tx.c.amount,
-                ),  # Debit subtracts amount
-                else_=0,
+                CategorySA.name.label("category_name"),
             )
-            running_total = (
-                func.sum(adjusted_amount)
-                .over(
-                    partition_by=tx.c.account_id,
-                    order_by=tx.c.date,
-                    rows=(None, 0),  # UNBOUNDED PRECEDING TO CURRENT ROW
-                )
-                .label("running_total")
+            .where(
+                TransactionSA.user_id == user_id,
             )
-
-            running_balance = running_total.label("running_balance")
-
-            running_total_cte = select(
+            .join(
+                AccountSA,
+                AccountSA.id == TransactionSA.account_id,
+                isouter=True,
+            )
+            .join(
+                CategorySA,
+                CategorySA.id == TransactionSA.category_id,
+                isouter=True,
+            )
+        )
+
+        initial_tx = select(
+            literal(value=randint(9999, 99999)).label("id"),
+            AccountSA.initial_balance.label("amount"),
+            AccountSA.created_at.label("date"),
+            literal("Account Creation").label("name"),
+            literal("credit").label("entry_type"),
+            literal(1).label("category_id"),
+            AccountSA.user_id.label("user_id"),
+            AccountSA.id.label("account_id"),
+            AccountSA.created_at.label("account_created_at"),
+            AccountSA.initial_balance.label("initial_balance"),
+            AccountSA.currency.label("currency"),
+            AccountSA.name.label("account_name"),
+            literal("Initial Balance").label("category_name"),
+        ).select_from(AccountSA)
+
+        combined_tx = initial_tx.union_all(tx_with_account).subquery()
+
+        tx = alias(combined_tx)
+
+        adjusted_amount: Case[int] = Case(
+            (
+                tx.c.entry_type == "credit",
                 tx.c.amount,
-                tx.c.date,
-                tx.c.name,
-                tx.c.entry_type,
-                tx.c.category_id,
-                tx.c.user_id,
-                tx.c.id,
-                tx.c.account_id,
-                tx.c.category_name,
-                tx.c.account_name,
-                tx.c.currency,
-                running_balance,
-            ).cte("RunningTotal")
+            ),  # Credit adds amount
+            (
+                tx.c.entry_type == "debit",
+                -tx.c.amount,
+            ),  # Debit subtracts amount
+            else_=0,
+        )
+        running_total = (
+            func.sum(adjusted_amount)
+            .over(
+                partition_by=tx.c.account_id,
+                order_by=tx.c.date,
+                rows=(None, 0),  # UNBOUNDED PRECEDING TO CURRENT ROW
+            )
+            .label("running_total")
+        )
+
+        running_balance = running_total.label("running_balance")
+
+        return select(
+            tx.c.amount,
+            tx.c.date,
+            tx.c.name,
+            tx.c.entry_type,
+            tx.c.category_id,
+            tx.c.user_id,
+            tx.c.id,
+            tx.c.account_id,
+            tx.c.category_name,
+            tx.c.account_name,
+            tx.c.currency,
+            running_balance,
+        ).cte("RunningTotal")
+
+    def get_transaction(self, user_id: int, transaction_id: int):
+        with SASession(bind=self.db_service.sa_engine) as session:
+            running_total_cte = self.__running_total_cte(user_id)
 
             stmt = (
                 select(
@@ -220,92 +291,7 @@ class TransactionRepository:
 
     def get_transactions(self, user_id: int):
         with SASession(bind=self.db_service.sa_engine) as session:
-            tx_with_account = (
-                select(
-                    TransactionSA.id,
-                    TransactionSA.amount,
-                    TransactionSA.date,
-                    TransactionSA.name,
-                    TransactionSA.entry_type,
-                    TransactionSA.category_id,
-                    TransactionSA.user_id,
-                    TransactionSA.account_id,
-                    AccountSA.created_at.label("account_created_at"),
-                    AccountSA.initial_balance,
-                    AccountSA.currency,
-                    AccountSA.name.label("account_name"),
-                    CategorySA.name.label("category_name"),
-                )
-                .where(TransactionSA.user_id == user_id)
-                .join(
-                    AccountSA,
-                    AccountSA.id == TransactionSA.account_id,
-                    isouter=True,
-                )
-                .join(
-                    CategorySA,
-                    CategorySA.id == TransactionSA.category_id,
-                    isouter=True,
-                )
-            )
-
-            initial_tx = select(
-                literal(value=randint(9999, 99999)).label("id"),
-                AccountSA.initial_balance.label("amount"),
-                AccountSA.created_at.label("date"),
-                literal("Account Creation").label("name"),
-                literal("credit").label("entry_type"),
-                literal(1).label("category_id"),
-                AccountSA.user_id.label("user_id"),
-                AccountSA.id.label("account_id"),
-                AccountSA.created_at.label("account_created_at"),
-                AccountSA.initial_balance.label("initial_balance"),
-                AccountSA.currency.label("currency"),
-                AccountSA.name.label("account_name"),
-                literal("Initial Balance").label("category_name"),
-            ).select_from(AccountSA)
-
-            combined_tx = initial_tx.union_all(tx_with_account).subquery()
-
-            tx = alias(combined_tx)
-
-            adjusted_amount: Case[int] = Case(
-                (
-                    tx.c.entry_type == "credit",
-                    tx.c.amount,
-                ),  # Credit adds amount
-                (
-                    tx.c.entry_type == "debit",
-                    -tx.c.amount,
-                ),  # Debit subtracts amount
-                else_=0,
-            )
-            running_total = (
-                func.sum(adjusted_amount)
-                .over(
-                    partition_by=tx.c.account_id,
-                    order_by=tx.c.date,
-                    rows=(None, 0),  # UNBOUNDED PRECEDING TO CURRENT ROW
-                )
-                .label("running_total")
-            )
-
-            running_balance = running_total.label("running_balance")
-
-            running_total_cte = select(
-                tx.c.amount,
-                tx.c.date,
-                tx.c.name,
-                tx.c.entry_type,
-                tx.c.category_id,
-                tx.c.user_id,
-                tx.c.id,
-                tx.c.account_id,
-                tx.c.category_name,
-                tx.c.account_name,
-                tx.c.currency,
-                running_balance,
-            ).cte("RunningTotal")
+            running_total_cte = self.__running_total_cte(user_id)
 
             stmt = select(
                 running_total_cte.c.id,
@@ -375,6 +361,87 @@ class TransactionRepository:
                 for transaction_result in result_tuples
             ]
 
+    def get_transactions_by_ids(
+        self,
+        user_id: int,
+        transaction_ids: list[int],
+    ) -> list[TransactionPublic]:
+        """Get the public views of several transactions with one query.
+
+        Args:
+            user_id: ID of the user who owns the transactions
+            transaction_ids: IDs of the transactions
+
+        Returns:
+            The transactions in the order of `transaction_ids`, skipping
+            unknown IDs
+
+        """
+        if not transaction_ids:
+            return []
+
+        with SASession(bind=self.db_service.sa_engine) as session:
+            running_total_cte = self.__running_total_cte(user_id)
+
+            stmt = select(
+                running_total_cte.c.id,
+                running_total_cte.c.account_id,
+                running_total_cte.c.amount,
+                running_total_cte.c.category_name,
+                running_total_cte.c.entry_type,
+                running_total_cte.c.category_id,
+                running_total_cte.c.user_id,
+                running_total_cte.c.name,
+                running_total_cte.c.date,
+                running_total_cte.c.account_name,
+                running_total_cte.c.currency,
+                running_total_cte.c.running_balance,
+            ).where(
+                running_total_cte.c.id.in_(transaction_ids),
+                running_total_cte.c.category_name != "Initial Balance",
+            )
+
+            result_by_id = {
+                result.id: result
+                for result in session.execute(
+                    stmt,
+                    execution_options={"prebuffer_rows": True},
+                ).mappings()
+            }
+
+            suggested_map: dict[int, list[dict]] = defaultdict(list)
+            rows = session.execute(
+                select(
+                    SuggestedCategory.category_id,
+                    SuggestedCategory.transaction_id,
+                    CategorySA.name,
+                )
+                .where(SuggestedCategory.transaction_id.in_(transaction_ids))
+                .join(
+                    CategorySA,
+                    SuggestedCategory.category_id == CategorySA.id,
+                )
+            ).all()
+            for category_id, transaction_id, name in rows:
+                suggested_map[transaction_id].append(
+                    {
+                        "category_name": name,
+                        "category_id": category_id,
+                    },
+                )
+
+            return [
+                TransactionPublic.model_validate(
+                    {
+                        **result_by_id[transaction_id],
+                        "date": result_by_id[transaction_id].date.isoformat() + "Z",
+                        "suggested_categories": suggested_map.get(transaction_id, []),
+                    },
+                )
+                for transaction_id in transaction_ids
+                if transaction_id in result_by_id
+            ]
+
     def edit_transaction(self, transaction_id: int, values: TransactionEditRequest):
         dict_values = values.model_dump(exclude_none=True)
         with SASession(bind=self.db_service.sa_engine) as session:
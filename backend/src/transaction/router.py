@@ -3,15 +3,25 @@ from __future__ import annotations
 from collections.abc import Sequence
 from sqlite3 import DatabaseError
 from typing import Annotated
-from uuid import uuid4
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Request,
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse, StreamingResponse
 
 from src.app_logger.custom_logger import logger
 from src.common.stats import DurationModel, StatsService, get_stats_service
+from src.config import get_settings
+from src.transaction.job_status import JobStatusTracker, get_job_status_tracker
 from src.transaction.model import (
     ExpenseStatsDurationPublic,
+    JobStatusPublic,
     NetWorthStatsDurationPublic,
     TransactionCreate,
     TransactionDeleteRequest,
@@ -21,8 +31,11 @@ from src.transaction.model import (
     TransactionLLMCreateRequest,
     TransactionPublic,
 )
+from src.transaction.queue import InferenceQueue, QueueFullError, get_inference_queue
 from src.transaction.service import TransactionService, get_transaction_service
 
+config = get_settings()
+
 router = APIRouter()
 
 TRANSACTION_TAG = "transaction"
@@ -84,21 +97,68 @@ async def create_transaction_by_text(
         TransactionService,
         Depends(get_transaction_service),
     ],
+    inference_queue: Annotated[InferenceQueue, Depends(get_inference_queue)],
+    job_status: Annotated[JobStatusTracker, Depends(get_job_status_tracker)],
     background_tasks: BackgroundTasks,
 ):
     try:
-        job_id = str(uuid4())
-        background_tasks.add_task(
-            transaction_service.infer_and_create_transaction,
-            query,
-            job_id,
-        )
+        job_id, is_new_job = await transaction_service.claim_job(query)
+        if is_new_job:
+            await job_status.queued(job_id)
+            if config.JOB_EVENT_BROKER == "memory":
+                # Events stay in this process, so the job has to run here too
+                background_tasks.add_task(
+                    transaction_service.run_job_in_process,
+                    query,
+                    job_id,
+                )
+            else:
+                # Run by the inference workers, see src/worker.py
+                await inference_queue.enqueue(job_id, query)
         return {"job_id": job_id}
+    except QueueFullError as err:
+        await job_status.failed(job_id, error=str(err), attempts=0, final=True)
+        raise HTTPException(status_code=503, detail=str(err)) from err
     except Exception as err:
         logger.exception(JSONResponse(err))
         return HTTPException(status_code=500, detail=JSONResponse(err))
 
 
+@router.get(
+    "/transaction/job/{job_id}",
+    response_model=JobStatusPublic,
+    tags=[TRANSACTION_TAG],
+)
+async def get_transaction_job(
+    job_id: str,
+    transaction_service: Annotated[
+        TransactionService,
+        Depends(get_transaction_service),
+    ],
+):
+    job_status = await transaction_service.get_job_status(job_id)
+    if job_status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status
+
+
+@router.post(
+    "/transaction/job/{job_id}/cancel",
+    tags=[TRANSACTION_TAG],
+    status_code=202,
+)
+async def cancel_transaction_job(
+    job_id: str,
+    transaction_service: Annotated[
+        TransactionService,
+        Depends(get_transaction_service),
+    ],
+):
+    if not await transaction_service.cancel_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job_id": job_id}
+
+
 @router.get(
     "/transaction/stream/{job_id}",
     tags=[TRANSACTION_TAG],
@@ -110,11 +170,40 @@ async def get_transaction_stream(
         TransactionService,
         Depends(get_transaction_service),
     ],
+    last_event_id: Annotated[str | None, Header()] = None,
 ):
     return StreamingResponse(
         transaction_service.get_transaction_progress(
             request=request,
             job_id=job_id,
+            last_event_id=last_event_id,
+        ),
+        headers={
+            "Cache-Control": "no-cache",
+            "Content-Type": "text/event-stream",
+            "Connection": "keep-alive",
+        },
+    )
+
+
+@router.get(
+    "/transaction/events/{user_id}",
+    tags=[TRANSACTION_TAG],
+)
+async def get_user_events_stream(
+    user_id: int,
+    request: Request,
+    transaction_service: Annotated[
+        TransactionService,
+        Depends(get_transaction_service),
+    ],
+    last_event_id: Annotated[str | None, Header()] = None,
+):
+    return StreamingResponse(
+        transaction_service.get_user_events(
+            request=request,
+            user_id=user_id,
+            last_event_id=last_event_id,
         ),
         headers={
             "Cache-Control": "no-cache",
@@ -128,7 +217,7 @@ async def get_transaction_stream(
     "/transaction/edit/{transaction_id}",
     tags=[TRANSACTION_TAG],
 )
-def edit_transaction(
+async def edit_transaction(
     transaction_id: int,
     query: TransactionEditRequest,
     transaction_service: Annotated[
@@ -137,10 +226,18 @@ def edit_transaction(
     ],
 ):
     try:
-        return transaction_service.edit_transaction(
+        transaction = await run_in_threadpool(
+            transaction_service.edit_transaction,
             transaction_id=transaction_id,
             values=query,
         )
+        if transaction is not None:
+            await transaction_service.notify_transaction_changed(
+                "transaction.edited",
+                user_id=transaction.user_id,
+                transaction_id=transaction.id,
+            )
+        return transaction
     except Exception as err:
         logger.exception(JSONResponse(err))
         return HTTPException(status_code=500, detail=JSONResponse(err))
@@ -151,14 +248,22 @@ def edit_transaction(
     response_model=TransactionPublic,
     tags=[TRANSACTION_TAG],
 )
-def create_transactions(
+async def create_transactions(
     query: TransactionCreate,
     transaction_service: Annotated[
         TransactionService, Depends(get_transaction_service)
     ],
 ):
     try:
-        transaction = transaction_service.create_transaction(transaction=query)
+        transaction = await run_in_threadpool(
+            transaction_service.create_transaction,
+            transaction=query,
+        )
+        await transaction_service.notify_transaction_changed(
+            "transaction.created",
+            user_id=query.user_id,
+            transaction_id=transaction.id,
+        )
         return transaction
     except Exception as err:
         raise HTTPException(status_code=500, detail=err)
@@ -168,7 +273,7 @@ def create_transactions(
     "/transaction/delete",
     tags=[TRANSACTION_TAG],
 )
-def delete_transaction(
+async def delete_transaction(
     query: TransactionDeleteRequest,
     transaction_service: Annotated[
         TransactionService,
@@ -187,11 +292,17 @@ def delete_transaction(
         HTTPException: If transaction not found or doesn't belong to user
     """
     try:
-        success = transaction_service.delete_transaction(
+        success = await run_in_threadpool(
+            transaction_service.delete_transaction,
             transaction_id=query.transaction_id,
             user_id=query.user_id,
         )
         if success:
+            await transaction_service.notify_transaction_changed(
+                "transaction.deleted",
+                user_id=query.user_id,
+                transaction_id=query.transaction_id,
+            )
             return {"message": "Transaction deleted successfully"}
 
         raise HTTPException(status_code=404, detail="Transaction not found")
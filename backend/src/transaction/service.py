@@ -1,20 +1,54 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import time
+from collections.abc import Awaitable, Callable, Sequence
 from typing import Annotated
+from uuid import uuid4
 
 from fastapi import Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from redis import Redis  # noqa: TC002
 
 from src.account.model import AccountTransfer
 from src.account.service import AccountService, get_account_service
 from src.app_logger.custom_logger import logger
+from src.category.model import CategorySA  # noqa: TC001
 from src.category.service import CategoryService, get_category_service
 from src.common.llm import LLMService, get_llm_service
+from src.common.metrics import (
+    INFERENCE_SECONDS,
+    SPECULATIVE_SUGGESTIONS,
+    USER_EVENTS_CLIENTS,
+    USER_EVENTS_SLOW_CONSUMERS,
+)
+from src.config import get_settings
 from src.redis_client import get_async_redis_client, get_redis_client
 from src.transaction.agent import TransactionAgent, get_transaction_agent
+from src.transaction.cancellation import (
+    CancellationToken,
+    JobCancelledError,
+    get_job_cancellation,
+)
+from src.transaction.chunking import merge_chunk_results, split_into_chunks
+from src.transaction.coalescing import get_job_coalescer
+from src.transaction.events import (
+    DONE_EVENT,
+    PROGRESS_PREFIX,
+    JobChannel,
+    get_job_event_broker,
+    job_stream_key,
+    progress_event,
+    user_event,
+    user_stream_key,
+)
+from src.transaction.heuristics import predict_unknown_category
+from src.transaction.job_status import get_job_status_tracker
 from src.transaction.model import (
     EntryType,
+    JobState,
+    JobStatusPublic,
     TransactionBankTransfer,
     TransactionCreate,
     TransactionEditRequest,
@@ -24,6 +58,8 @@ from src.transaction.model import (
 )
 from src.transaction.repository import TransactionRepository, get_transaction_repository
 
+config = get_settings()
+
 
 class TransactionService:
     """Service class for managing transaction operations including creation, inference, and streaming.
@@ -64,6 +100,10 @@ class TransactionService:
         self.account_service = account_service
         # Initialize async Redis client for streaming operations
         self.async_redis_client = get_async_redis_client()
+        self.job_events = get_job_event_broker()
+        self.job_status = get_job_status_tracker()
+        self.job_cancellation = get_job_cancellation()
+        self.job_coalescer = get_job_coalescer()
 
     def __match_infer_data_with_records(
         self,
@@ -97,120 +137,542 @@ class TransactionService:
             transaction_create=transaction,
         )
 
-    def get_category_transaction_suggestion(
+    async def get_category_transaction_suggestions(
         self,
         query: TransactionLLMCreateRequest,
-    ) -> list[int]:
-        """Get category suggestions for a transaction based on text description.
+        names: list[str],
+        category_model_list: Sequence[CategorySA],
+        call: str = "suggest_categories",
+    ) -> list[list[int]]:
+        """Get category suggestions for several uncategorized transactions at once.
+
+        All names go to the model in a single call, and suggested names are
+        resolved against the category list the job already fetched instead of
+        querying the database again.
 
         Args:
-            query: The transaction creation request containing text to analyze
+            query: The transaction creation request the transactions came from
+            names: Names of the transactions that ended up "unknown"
+            category_model_list: The user's categories, fetched once per job
+            call: Call name the model call is recorded under
 
         Returns:
-            List of suggested category IDs based on the text description
+            One list of suggested category IDs per name, in order
 
         """
-        category_model_list = self.category_service.get_category_by_user_id()
+        category_by_name = {
+            category_model.lower_cased_name: category_model
+            for category_model in category_model_list
+            if category_model.lower_cased_name != "unknown"
+        }
+
+        suggested_lists = await self.transaction_agent.suggest_categories(
+            names,
+            user_id=query.user_id,
+            category_list=list(category_by_name),
+            call=call,
+        )
 
-        category_list = [
-            category_model.lower_cased_name for category_model in category_model_list
+        return [
+            [
+                category_by_name[name.lower()].id  # type: ignore
+                for name in suggested_list
+                if name.lower() in category_by_name
+            ]
+            for suggested_list in suggested_lists
         ]
 
-        category_list = [
-            category_name
-            for category_name in category_list
-            if category_name != "unknown"
-        ]
+    @staticmethod
+    def __coalesce_key(query: TransactionLLMCreateRequest) -> str:
+        normalized_text = " ".join(query.text.split()).casefold()
+        digest = hashlib.sha256(
+            f"{query.user_id}:{query.account_id}:{normalized_text}".encode(),
+        ).hexdigest()
+        return f"job:coalesce:{digest}"
 
-        suggested_list = self.transaction_agent.suggest_category(
-            query.text,
-            category_list=category_list,
-        )
-        if suggested_list is None:
-            return []
+    async def claim_job(self, query: TransactionLLMCreateRequest) -> tuple[str, bool]:
+        """Return the job id for a create-by-text request and whether it is new.
 
-        d_category_list = self.category_service.get_categories_by_lower_cased_name(
-            category_list=suggested_list,
+        Identical submissions (same user, account and whitespace/case
+        normalized text) within `JOB_COALESCE_WINDOW_SECONDS` share the first
+        request's job, so double taps and client retries attach to the running
+        job and its SSE stream instead of starting another inference.
+
+        Args:
+            query: The transaction creation request
+
+        Returns:
+            Tuple of the job id and True if the caller should start the job
+
+        """
+        job_id = str(uuid4())
+        running_job_id = await self.job_coalescer.claim(
+            self.__coalesce_key(query),
+            job_id,
         )
+        if running_job_id == job_id:
+            return job_id, True
 
-        return [category.id for category in d_category_list]
+        logger.info("Coalesced create-by-text request into job %s", running_job_id)
+        return running_job_id, False
 
-    def infer_and_create_transaction(
+    async def infer_and_create_transaction(
         self,
         query: TransactionLLMCreateRequest,
         job_id: str,
-    ):
+    ) -> JobState:
         """Infer and create transactions from text description using LLM.
 
         This method processes text input to infer transaction details, creates
-        database records, and streams progress updates via Redis pub/sub.
+        database records, and streams progress updates to the job's Redis stream.
+        Jobs are run by the inference workers (`src/worker.py`), or by
+        `run_job_in_process` in the in-process job mode.
+
+        LLM calls go through the providers' async clients and Redis through the
+        async client, so the job runs on the event loop; only the short,
+        blocking SQLite calls are handed to the threadpool.
+
+        A job stops at the next stage boundary once it is cancelled (see
+        `JobCancellation`). Its rows are written in a single commit that is
+        not interrupted, so a cancelled job has either all of its rows or
+        none of them.
+
+        Args:
+            query: The transaction creation request with text to process
+            job_id: Unique identifier for tracking this job's progress
+
+        Returns:
+            The job's final state, `done` or `cancelled`
+
+        """
+        channel = JobChannel(self.job_events, job_id, query.user_id)
+        token = self.job_cancellation.token(job_id)
+        try:
+            await self.__run_job(query, job_id, channel, token)
+        except JobCancelledError:
+            logger.info("Job %s was cancelled", job_id)
+            await channel.finish()
+            await self.job_status.update(job_id, state=JobState.cancelled.value)
+            return JobState.cancelled
+        return JobState.done
+
+    async def run_job_in_process(
+        self,
+        query: TransactionLLMCreateRequest,
+        job_id: str,
+    ) -> None:
+        """Run a job in this process, when `JOB_EVENT_BROKER` is "memory".
+
+        There is no queue to retry it from, so a failed job is marked failed
+        straight away and its streams are finished, letting SSE clients stop
+        waiting.
 
         Args:
             query: The transaction creation request with text to process
             job_id: Unique identifier for tracking this job's progress
 
         """
-        category_model_list = self.category_service.get_category_by_user_id()
+        try:
+            await self.infer_and_create_transaction(query, job_id)
+        except Exception as err:
+            logger.exception("Inference job %s failed", job_id)
+            await self.job_status.failed(
+                job_id,
+                error=repr(err),
+                attempts=1,
+                final=True,
+            )
+            await JobChannel(self.job_events, job_id, query.user_id).finish()
+
+    async def __run_job(
+        self,
+        query: TransactionLLMCreateRequest,
+        job_id: str,
+        channel: JobChannel,
+        token: CancellationToken,
+    ) -> None:
+        if await self.job_status.is_persisted(job_id):
+            # A retry of a job that failed after its commit, running it again
+            # would insert its rows twice
+            logger.warning("Job %s was already persisted, finishing it", job_id)
+            await self.__finish_job(job_id, channel)
+            return
+
+        await token.raise_if_cancelled()
+        await self.job_status.update(job_id, state=JobState.running.value)
+
+        category_model_list = await run_in_threadpool(
+            self.category_service.get_category_by_user_id,
+        )
         category_list = [
             category_model.lower_cased_name for category_model in category_model_list
         ]
 
         # Fetch accounts for the user and convert to AccountTransfer
-        account_records = self.account_service.get_account_by_user_id(query.user_id)
+        account_records = await run_in_threadpool(
+            self.account_service.get_account_by_user_id,
+            query.user_id,
+        )
         account_transfer_list = [AccountTransfer(**acc) for acc in account_records]
 
-        transactions = self.transaction_agent.infer_from_text(
-            text=query.text,
-            category_list=category_list,
-            account_list=account_transfer_list,
+        started = time.perf_counter()
+        chunks = split_into_chunks(
+            query.text,
+            max_chars=config.INFERENCE_CHUNK_MAX_CHARS,
+            overlap_lines=config.INFERENCE_CHUNK_OVERLAP_LINES,
+        )
+        speculative_suggestion = None
+        if (
+            len(chunks) == 1
+            and config.SPECULATIVE_CATEGORY_SUGGESTION
+            and predict_unknown_category(
+                query.text,
+                category_list,
+            )
+        ):
+            # Likely to end up "unknown", so suggest alongside inference
+            # instead of after it and drop the result if it is not needed
+            speculative_suggestion = asyncio.create_task(
+                self.get_category_transaction_suggestions(
+                    query,
+                    [query.text],
+                    category_model_list,
+                    call="speculative_suggest_categories",
+                ),
+            )
+
+        async def on_formatted():
+            await self.job_status.update(job_id, "formatted")
+
+        try:
+            if len(chunks) == 1:
+                transactions = await self.transaction_agent.infer_from_text(
+                    text=query.text,
+                    user_id=query.user_id,
+                    category_list=category_list,
+                    account_list=account_transfer_list,
+                    on_formatted=on_formatted,
+                    check_cancelled=token.raise_if_cancelled,
+                )
+            else:
+                transactions = await self.infer_in_chunks(
+                    query,
+                    chunks,
+                    category_list,
+                    account_transfer_list,
+                    channel=channel,
+                    on_formatted=on_formatted,
+                    check_cancelled=token.raise_if_cancelled,
+                )
+            await token.raise_if_cancelled()
+        except BaseException:
+            if speculative_suggestion is not None:
+                self.__discard_speculative_suggestion(speculative_suggestion)
+            raise
+        await self.job_status.update(
+            job_id,
+            "inferred",
+            items_inferred=len(transactions),
+        )
+
+        categories = await self.categorize_transactions(
+            query,
+            transactions,
+            category_model_list,
+            speculative_suggestion=speculative_suggestion,
+        )
+        INFERENCE_SECONDS.labels(
+            speculative=str(speculative_suggestion is not None).lower(),
+        ).observe(time.perf_counter() - started)
+        await self.job_status.update(job_id, "categorized")
+
+        # Last chance to stop, the rows are committed all at once from here
+        await token.raise_if_cancelled()
+        persisted = await self.persist_transactions(
+            query,
+            transactions,
+            categories,
+            channel,
+        )
+        await self.job_status.update(job_id, "persisted", items_persisted=persisted)
+
+        await self.__finish_job(job_id, channel)
+
+    async def __finish_job(self, job_id: str, channel: JobChannel) -> None:
+        await channel.finish()
+        await self.job_status.update(job_id, "published", state=JobState.done.value)
+
+    async def infer_in_chunks(
+        self,
+        query: TransactionLLMCreateRequest,
+        chunks: list[str],
+        category_list: list[str],
+        account_list: list[AccountTransfer],
+        channel: JobChannel,
+        on_formatted: Callable[[], Awaitable[None]] | None = None,
+        check_cancelled: Callable[[], Awaitable[None]] | None = None,
+    ) -> list[TransactionLLMCreate | TransactionBankTransfer]:
+        """Infer transactions from a long statement one chunk at a time.
+
+        Chunks run in parallel, at most `INFERENCE_CHUNK_CONCURRENCY` at once,
+        and a progress event is published as each one finishes. Results are
+        merged back in statement order with duplicates at chunk edges dropped.
+
+        Args:
+            query: The transaction creation request the chunks came from
+            chunks: The statement split at item boundaries
+            category_list: Lower cased category names of the user
+            account_list: Accounts of the user
+            channel: Channel of the job's events
+            on_formatted: Called as each chunk's text has been formatted
+            check_cancelled: Raises `JobCancelledError` once the job is cancelled
+
+        Returns:
+            The inferred transactions and bank transfers, in statement order
+
+        """
+        semaphore = asyncio.Semaphore(config.INFERENCE_CHUNK_CONCURRENCY)
+        completed = 0
+
+        async def infer_chunk(chunk: str):
+            nonlocal completed
+            async with semaphore:
+                results = await self.transaction_agent.infer_from_text(
+                    text=chunk,
+                    user_id=query.user_id,
+                    category_list=category_list,
+                    account_list=account_list,
+                    on_formatted=on_formatted,
+                    check_cancelled=check_cancelled,
+                )
+            completed += 1
+            await channel.publish(
+                progress_event(
+                    {
+                        "completed": completed,
+                        "total": len(chunks),
+                        "items": len(results),
+                    },
+                ),
+            )
+            return results
+
+        logger.info("Inferring statement in %s chunks", len(chunks))
+        chunk_results = await asyncio.gather(*(infer_chunk(chunk) for chunk in chunks))
+        return merge_chunk_results(
+            list(chunk_results),
+            overlap_lines=config.INFERENCE_CHUNK_OVERLAP_LINES,
         )
-        channel = f"job:{job_id}"
-        log = f"{channel}:log"
 
-        for transaction in transactions:
+    @staticmethod
+    def __discard_speculative_suggestion(task: asyncio.Task) -> None:
+        """Drop an unused speculative suggestion.
+
+        A finished task has its exception retrieved, so a failed suggestion
+        nobody needed is not reported as never retrieved; a running one is
+        cancelled.
+        """
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled() and task.exception() is not None:
+            logger.debug("Unused speculative suggestion failed: %r", task.exception())
+
+    @staticmethod
+    def format_event(event_id: str, data: str) -> str:
+        """Format a job event from Redis as an SSE event."""
+        if data.startswith(PROGRESS_PREFIX):
+            return (
+                f"id: {event_id}\nevent: progress\n"
+                f"data: {data.removeprefix(PROGRESS_PREFIX)}\n\n"
+            )
+        if data == DONE_EVENT:
+            return f"id: {event_id}\nevent: message\ndata: done\n\n"
+        return f"id: {event_id}\nevent: message\ndata: {data}\n\n"
+
+    async def categorize_transactions(
+        self,
+        query: TransactionLLMCreateRequest,
+        transactions: list[TransactionLLMCreate | TransactionBankTransfer],
+        category_model_list: Sequence[CategorySA],
+        speculative_suggestion: asyncio.Task[list[list[int]]] | None = None,
+    ) -> dict[int, tuple[CategorySA | None, list[int]]]:
+        """Resolve categories for every standard transaction of a job.
+
+        Transactions the agent could not categorize are collected and sent to
+        a single batched suggestion call. A speculative suggestion for the
+        whole text is used instead when it was the only unknown item, and
+        cancelled otherwise. If it failed, the batched call is made after all.
+
+        Args:
+            query: The original transaction creation request
+            transactions: The transactions inferred for the job
+            category_model_list: The user's categories, fetched once per job
+            speculative_suggestion: Suggestion started alongside inference
+
+        Returns:
+            Mapping of transaction index to its category and suggested category IDs
+
+        """
+        category_by_name = {
+            category_model.lower_cased_name: category_model
+            for category_model in category_model_list
+        }
+
+        categories: dict[int, tuple[CategorySA | None, list[int]]] = {}
+        unknown_indexes: list[int] = []
+        for index, transaction in enumerate(transactions):
             if isinstance(transaction, TransactionBankTransfer):
-                self.handle_bank_transfer(
+                continue
+
+            category = category_by_name.get(transaction.category_name.lower())
+            if category is None:
+                category = await run_in_threadpool(
+                    self.__match_infer_data_with_records,
                     transaction,
-                    query,
-                    channel,
-                    log=log,
                 )
-                continue
-            self.handle_standard_transaction(
-                transaction,
+
+            categories[index] = (category, [])
+            if category is not None and category.lower_cased_name == "unknown":
+                unknown_indexes.append(index)
+
+        if speculative_suggestion is not None:
+            if len(unknown_indexes) == 1:
+                try:
+                    (suggested_categories,) = await speculative_suggestion
+                except Exception:
+                    # Only an optimisation, the batched call below still runs
+                    logger.exception("Speculative category suggestion failed")
+                    SPECULATIVE_SUGGESTIONS.labels(outcome="failed").inc()
+                else:
+                    SPECULATIVE_SUGGESTIONS.labels(outcome="used").inc()
+                    index = unknown_indexes[0]
+                    categories[index] = (categories[index][0], suggested_categories)
+                    return categories
+            else:
+                SPECULATIVE_SUGGESTIONS.labels(
+                    outcome="wasted" if speculative_suggestion.done() else "cancelled",
+                ).inc()
+                self.__discard_speculative_suggestion(speculative_suggestion)
+
+        if unknown_indexes:
+            logger.debug("Suggesting categories for %d items", len(unknown_indexes))
+            suggestions = await self.get_category_transaction_suggestions(
                 query,
-                channel,
-                log=log,
+                [transactions[index].name for index in unknown_indexes],
+                category_model_list,
             )
+            for index, suggested_categories in zip(
+                unknown_indexes,
+                suggestions,
+                strict=True,
+            ):
+                categories[index] = (categories[index][0], suggested_categories)
 
-        self.redis_client.publish(
-            channel=channel,
-            message="[DONE]",
-        )
-        self.redis_client.expire(log, 120)
+        return categories
 
-    def handle_bank_transfer(
+    async def persist_transactions(
         self,
-        transaction: TransactionBankTransfer,
         query: TransactionLLMCreateRequest,
-        channel: str,
-        log: str,
-    ):
-        """Handle bank transfer transactions by creating debit and credit entries.
+        transactions: list[TransactionLLMCreate | TransactionBankTransfer],
+        categories: dict[int, tuple[CategorySA | None, list[int]]],
+        channel: JobChannel,
+    ) -> int:
+        """Write all rows of a job in one commit and publish them together.
+
+        Bank transfers become a debit from the source account and a credit to
+        the destination account. The rows' public views, with their running
+        balances, are fetched with one query once they are committed.
 
-        Bank transfers require two transactions: a debit from the source account
-        and a credit to the destination account.
+        Args:
+            query: The original transaction creation request
+            transactions: The transactions inferred for the job
+            categories: Category and suggested category IDs by transaction index
+            channel: Channel of the job's events
+
+        Returns:
+            The number of transactions created
+
+        """
+        transfer_categories = None
+        if any(isinstance(t, TransactionBankTransfer) for t in transactions):
+            transfer_categories = (
+                await run_in_threadpool(
+                    self.category_service.get_transfer_category_debit,
+                ),
+                await run_in_threadpool(
+                    self.category_service.get_transfer_category_credit,
+                ),
+            )
+
+        transaction_creates: list[TransactionCreate] = []
+        for index, transaction in enumerate(transactions):
+            if isinstance(transaction, TransactionBankTransfer):
+                transaction_creates.extend(
+                    self.__bank_transfer_legs(
+                        transaction,
+                        query,
+                        *transfer_categories,  # type: ignore[misc]
+                    ),
+                )
+                continue
+
+            category, suggested_categories = categories.get(index, (None, []))
+            if category is None:
+                logger.error("Category is none for %s", query.text)
+                continue
+
+            transaction_creates.append(
+                TransactionCreate(
+                    category_id=category.id,  # type: ignore
+                    entry_type=category.entry_type,
+                    account_id=query.account_id,
+                    user_id=query.user_id,
+                    name=transaction.name,
+                    amount=transaction.amount,
+                    date=transaction.date,
+                    suggested_categories=suggested_categories,
+                ),
+            )
+
+        transaction_ids = await run_in_threadpool(
+            self.transaction_repository.create_transactions,
+            transaction_creates,
+        )
+        transactions_public = await run_in_threadpool(
+            self.transaction_repository.get_transactions_by_ids,
+            user_id=query.user_id,
+            transaction_ids=transaction_ids,
+        )
+        if transactions_public:
+            await channel.publish(
+                *(
+                    transaction_public.model_dump_json()
+                    for transaction_public in transactions_public
+                ),
+            )
+        return len(transaction_ids)
+
+    @staticmethod
+    def __bank_transfer_legs(
+        transaction: TransactionBankTransfer,
+        query: TransactionLLMCreateRequest,
+        debit_category: CategorySA,
+        credit_category: CategorySA,
+    ) -> tuple[TransactionCreate, TransactionCreate]:
+        """Build the debit and credit transactions of a bank transfer.
 
         Args:
             transaction: The bank transfer transaction data
             query: The original transaction creation request
-            channel: Redis pub/sub channel for streaming updates
-            log: Redis list key for storing transaction logs
+            debit_category: The user's outgoing transfer category
+            credit_category: The user's incoming transfer category
+
+        Returns:
+            The debit from `bank_from` and the credit to `bank_towards`
 
         """
-        # Create debit transaction for bank_from
         debit_transaction = TransactionCreate(
-            category_id=self.category_service.get_transfer_category_debit().id,  # type: ignore
+            category_id=debit_category.id,  # type: ignore
             entry_type=EntryType.debit,
             account_id=transaction.bank_from.id,
             user_id=query.user_id,
@@ -219,24 +681,8 @@ class TransactionService:
             date=transaction.date,
             suggested_categories=[],
         )
-        db_debit = self.create_transaction(transaction=debit_transaction)
-        t_public_debit = self.transaction_repository.get_transaction(
-            user_id=query.user_id,
-            transaction_id=db_debit.id,
-        )
-        t_dumped_debit = t_public_debit.model_dump_json()
-        self.redis_client.publish(
-            channel=channel,
-            message=t_dumped_debit,
-        )
-        self.redis_client.rpush(
-            log,
-            t_dumped_debit,
-        )
-
-        # Create credit transaction for bank_towards
         credit_transaction = TransactionCreate(
-            category_id=self.category_service.get_transfer_category_credit().id,  # type: ignore
+            category_id=credit_category.id,  # type: ignore
             entry_type=EntryType.credit,
             account_id=transaction.bank_towards.id,
             user_id=query.user_id,
@@ -245,129 +691,211 @@ class TransactionService:
             date=transaction.date,
             suggested_categories=[],
         )
-        db_credit = self.create_transaction(transaction=credit_transaction)
-        t_public_credit = self.transaction_repository.get_transaction(
-            user_id=query.user_id,
-            transaction_id=db_credit.id,
-        )
-        t_dumped_credit = t_public_credit.model_dump_json()
-        self.redis_client.publish(
-            channel=channel,
-            message=t_dumped_credit,
-        )
-        self.redis_client.rpush(
-            log,
-            t_dumped_credit,
-        )
+        return debit_transaction, credit_transaction
 
-    def handle_standard_transaction(
+    async def get_transaction_progress(
         self,
-        transaction: TransactionLLMCreate,
-        query: TransactionLLMCreateRequest,
-        channel: str,
-        log: str,
+        request: Request,
+        job_id: str,
+        last_event_id: str | None = None,
     ):
-        """Handle standard (non-transfer) transactions.
+        """Stream transaction progress updates via Server-Sent Events (SSE).
 
-        Creates a single transaction record and streams the result via Redis.
+        Events are read from the job event broker, so a new client gets the
+        whole job from the start and a reconnecting client resumes right after
+        the `Last-Event-ID` it last saw, without gaps or repeats. Each event
+        carries its event id as the SSE `id:`.
+
+        When the last client of an unfinished job goes away and none comes
+        back within `JOB_CANCEL_GRACE_SECONDS`, the job is cancelled.
 
         Args:
-            transaction: The LLM-inferred transaction data
-            query: The original transaction creation request
-            channel: Redis pub/sub channel for streaming updates
-            log: Redis list key for storing transaction logs
+            request: FastAPI request object for connection management
+            job_id: Unique identifier for the transaction processing job
+            last_event_id: Stream entry id to resume after, if reconnecting
+
+        Yields:
+            Server-Sent Events formatted messages with transaction data
 
         """
-        suggested_categories = []
-        category = self.__match_infer_data_with_records(transaction)
+        stream = job_stream_key(job_id)
+        last_id = last_event_id or "0-0"
 
-        if category is None:
-            logger.error("Category is none for %s", query.text)
-            return
+        done = False
+        await self.job_cancellation.attach(job_id)
+        try:
+            while True:
+                # Block until new events arrive, waking up now and then only to
+                # notice disconnected clients
+                events = await self.job_events.read(
+                    stream,
+                    last_id,
+                    block=config.SSE_DISCONNECT_CHECK_SECONDS,
+                )
 
-        if category.lower_cased_name == "unknown":
-            logger.debug("Category is none!")
-            suggested_categories = self.get_category_transaction_suggestion(
-                query=query,
+                if not events:
+                    if await request.is_disconnected():
+                        return
+                    continue
+
+                for event_id, data in events:
+                    last_id = event_id
+                    yield self.format_event(event_id, data)
+                    if data == DONE_EVENT:
+                        done = True
+                        return
+        finally:
+            self.job_cancellation.detach(
+                job_id,
+                cancel_after=(
+                    config.JOB_CANCEL_GRACE_SECONDS
+                    if config.JOB_CANCEL_ON_DISCONNECT and not done
+                    else None
+                ),
             )
 
-        create_transaction = TransactionCreate(
-            category_id=category.id,  # type: ignore
-            entry_type=category.entry_type,
-            account_id=query.account_id,
-            user_id=query.user_id,
-            name=transaction.name,
-            amount=transaction.amount,
-            date=transaction.date,
-            suggested_categories=suggested_categories,
-        )
-
-        db_t = self.create_transaction(transaction=create_transaction)
-
-        t_public = self.transaction_repository.get_transaction(
-            user_id=query.user_id,
-            transaction_id=db_t.id,
-        )
-        t_dumped = t_public.model_dump_json()
-
-        self.redis_client.publish(
-            channel=channel,
-            message=t_dumped,
-        )
-        self.redis_client.rpush(
-            log,
-            t_dumped,
-        )
+    async def get_user_events(
+        self,
+        request: Request,
+        user_id: int,
+        last_event_id: str | None = None,
+    ):
+        """Stream all events of a user's jobs and transaction changes via SSE.
 
-    async def get_transaction_progress(self, request: Request, job_id: str):
-        """Stream transaction progress updates via Server-Sent Events (SSE).
+        One connection covers every create-by-text job of the user, tagged
+        with its `job_id`, plus `transaction.created`, `transaction.edited`
+        and `transaction.deleted` notifications. A new client gets events
+        from now on, a reconnecting one resumes after `Last-Event-ID`.
 
-        This method provides real-time updates for transaction processing jobs.
-        It first sends any backlogged messages, then streams new messages as they arrive.
+        Events are read ahead into a buffer of `USER_EVENTS_CLIENT_BUFFER`
+        events. A client that falls that far behind is sent an `overflow`
+        event with the id of the last event it got and disconnected, rather
+        than buffered without bound; it can reconnect from that id while
+        the stream still holds the events.
+        A heartbeat comment goes out every `SSE_HEARTBEAT_SECONDS` of
+        silence to keep proxies from closing the connection.
 
         Args:
             request: FastAPI request object for connection management
-            job_id: Unique identifier for the transaction processing job
+            user_id: ID of the user whose events to stream
+            last_event_id: Stream entry id to resume after, if reconnecting
 
         Yields:
-            Server-Sent Events formatted messages with transaction data
+            Server-Sent Events formatted messages and heartbeats
 
         """
-        pub_sub = self.redis_client.pubsub()
+        stream = user_stream_key(user_id)
+        delivered_id = last_event_id or await self.job_events.latest_id(stream)
+        buffer: asyncio.Queue[tuple[str, str]] = asyncio.Queue(
+            maxsize=config.USER_EVENTS_CLIENT_BUFFER,
+        )
+        overflowed = asyncio.Event()
+
+        async def read_ahead():
+            last_id = delivered_id
+            while True:
+                events = await self.job_events.read(
+                    stream,
+                    last_id,
+                    block=config.SSE_DISCONNECT_CHECK_SECONDS,
+                )
+                for event in events:
+                    try:
+                        buffer.put_nowait(event)
+                    except asyncio.QueueFull:
+                        overflowed.set()
+                        return
+                    last_id = event[0]
+
+        reader = asyncio.create_task(read_ahead())
+        USER_EVENTS_CLIENTS.inc()
+        try:
+            while True:
+                if overflowed.is_set():
+                    USER_EVENTS_SLOW_CONSUMERS.inc()
+                    logger.warning("Dropping slow events client of user %s", user_id)
+                    overflow = user_event("overflow", last_event_id=delivered_id)
+                    yield f"event: overflow\ndata: {overflow}\n\n"
+                    return
+
+                try:
+                    event_id, data = await asyncio.wait_for(
+                        buffer.get(),
+                        timeout=config.SSE_HEARTBEAT_SECONDS,
+                    )
+                except TimeoutError:
+                    if reader.done() or await request.is_disconnected():
+                        return
+                    yield ": heartbeat\n\n"
+                    continue
+
+                yield f"id: {event_id}\nevent: message\ndata: {data}\n\n"
+                delivered_id = event_id
+        finally:
+            reader.cancel()
+            USER_EVENTS_CLIENTS.dec()
 
-        channel = f"job:{job_id}"
-        log = f"{channel}:log"
-        pub_sub.subscribe(channel)
+    async def notify_transaction_changed(
+        self,
+        event_type: str,
+        user_id: int,
+        transaction_id: int,
+    ) -> None:
+        """Publish a transaction change to the user's events stream.
+
+        Notifications are best effort and never fail the change itself.
 
+        Args:
+            event_type: `transaction.created`, `transaction.edited` or
+                `transaction.deleted`
+            user_id: ID of the user who owns the transaction
+            transaction_id: ID of the changed transaction
+
+        """
+        payload: dict = {"transaction_id": transaction_id}
         try:
-            logs: list[str] = self.redis_client.lrange(log, 0, -1)
-            if logs:
-                for msg in logs:
-                    yield f"data: {msg}\n\n"
-                self.redis_client.ltrim(log, len(logs), -1)
+            if event_type != "transaction.deleted":
+                transaction = await run_in_threadpool(
+                    self.transaction_repository.get_transaction,
+                    user_id=user_id,
+                    transaction_id=transaction_id,
+                )
+                payload["transaction"] = transaction.model_dump(mode="json")
 
-            while True:
-                message = pub_sub.get_message()
+            await self.job_events.publish(
+                user_stream_key(user_id),
+                user_event(event_type, **payload),
+            )
+        except Exception:
+            # The change is committed already, so only log a lost notification
+            logger.exception("Failed to publish %s of %s", event_type, transaction_id)
 
-                if message:
-                    if message["type"] != "message":
-                        continue
+    async def cancel_job(self, job_id: str) -> bool:
+        """Ask a job to stop at its next stage boundary.
 
-                    data = message["data"]
+        Args:
+            job_id: Unique identifier for the transaction processing job
 
-                    if data == "[DONE]":
-                        yield "event: message\ndata: done\n\n"
-                        break
+        Returns:
+            False if the job is unknown or expired
 
-                    yield f"event: message\ndata: {data}\n\n"
+        """
+        if await self.job_status.get(job_id) is None:
+            return False
+        await self.job_cancellation.cancel(job_id)
+        return True
 
-                    if await request.is_disconnected():
-                        break
-                await asyncio.sleep(0.001)  # be nice to the system :)
+    async def get_job_status(self, job_id: str) -> JobStatusPublic | None:
+        """Return the state, item counts and stage timings of a job.
 
-        finally:
-            pub_sub.unsubscribe(channel)
-            pub_sub.close()
+        Args:
+            job_id: Unique identifier for the transaction processing job
+
+        Returns:
+            The job's status, or None if it is unknown or expired
+
+        """
+        return await self.job_status.get(job_id)
 
     def get_transactions(
         self,
@@ -0,0 +1,227 @@
+"""Inference worker: runs create-by-text jobs from the inference queue.
+
+Usage: python -m src.worker
+
+Starts `INFERENCE_WORKER_PROCESSES` processes, each running up to
+`INFERENCE_WORKER_CONCURRENCY` jobs at once and serving its metrics on
+`INFERENCE_WORKER_METRICS_PORT` + its index.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import signal
+
+from prometheus_client import start_http_server
+
+from src.account.repository import get_account_repository
+from src.account.service import get_account_service
+from src.app_logger.custom_logger import logger
+from src.category.cache import get_category_suggestion_cache
+from src.category.repository import get_category_repository
+from src.category.service import get_category_service
+from src.common.db import get_db_service
+from src.common.llm import get_llm_service, ollama_models, uses_ollama
+from src.common.metrics import INFERENCE_JOBS
+from src.common.providers import ollama_warmer
+from src.config import get_settings
+from src.redis_client import close_redis_pools, get_redis_client
+from src.transaction.agent import get_transaction_agent
+from src.transaction.events import JobChannel, get_job_event_broker
+from src.transaction.job_status import get_job_status_tracker
+from src.transaction.queue import InferenceJob, InferenceQueue, get_inference_queue
+from src.transaction.repository import get_transaction_repository
+from src.transaction.service import TransactionService, get_transaction_service
+
+config = get_settings()
+
+# How long a worker waits on an empty queue before checking for stale jobs
+READ_BLOCK_SECONDS = 5
+
+
+def build_transaction_service() -> TransactionService:
+    """Wire up `TransactionService` the way the FastAPI dependencies do."""
+    db_service = get_db_service()
+    llm_service = get_llm_service()
+    return get_transaction_service(
+        llm_service=llm_service,
+        transaction_repository=get_transaction_repository(db_service),
+        category_service=get_category_service(
+            category_repository=get_category_repository(db_service),
+            llm_service=llm_service,
+            suggestion_cache=get_category_suggestion_cache(),
+        ),
+        account_service=get_account_service(get_account_repository(db_service)),
+        transaction_agent=get_transaction_agent(),
+        redis_client=get_redis_client(),
+    )
+
+
+class InferenceWorker:
+    """Consumes the inference queue with bounded concurrency.
+
+    Jobs are acked once they finished, requeued when they fail and
+    dead-lettered after `INFERENCE_QUEUE_MAX_ATTEMPTS`. A job can run more
+    than once if its worker dies mid-way, so delivery is at least once; a
+    job whose rows were already committed is only finished on its retries.
+    """
+
+    def __init__(
+        self,
+        queue: InferenceQueue,
+        transaction_service: TransactionService,
+        concurrency: int,
+        consumer: str,
+    ) -> None:
+        self.queue = queue
+        self.transaction_service = transaction_service
+        self.concurrency = concurrency
+        self.consumer = consumer
+        self.job_status = get_job_status_tracker()
+        self.stopping = asyncio.Event()
+
+    async def __heartbeat(self, job: InferenceJob) -> None:
+        interval = self.queue.visibility_timeout_ms / 1000 / 3
+        while True:
+            await asyncio.sleep(interval)
+            await self.queue.heartbeat(self.consumer, job)
+
+    async def __handle(self, job: InferenceJob) -> None:
+        if job.attempts >= self.queue.max_attempts:
+            # Reclaimed from workers that died on every attempt
+            logger.error("Inference job %s killed its workers", job.job_id)
+            await self.queue.dead_letter(job, job.attempts)
+            await self.__record_failure(
+                job,
+                "Worker stopped while running the job",
+                job.attempts,
+                requeued=False,
+            )
+            return
+
+        heartbeat = asyncio.create_task(self.__heartbeat(job))
+        try:
+            state = await self.transaction_service.infer_and_create_transaction(
+                job.query,
+                job.job_id,
+            )
+        except Exception as err:
+            logger.exception("Inference job %s failed", job.job_id)
+            requeued = await self.queue.retry(job)
+            await self.__record_failure(
+                job,
+                repr(err),
+                job.attempts + 1,
+                requeued=requeued,
+            )
+        else:
+            await self.queue.ack(job)
+            INFERENCE_JOBS.labels(outcome=state.value).inc()
+        finally:
+            heartbeat.cancel()
+
+    async def __record_failure(
+        self,
+        job: InferenceJob,
+        error: str,
+        attempts: int,
+        *,
+        requeued: bool,
+    ) -> None:
+        await self.job_status.failed(
+            job.job_id,
+            error=error,
+            attempts=attempts,
+            final=not requeued,
+        )
+        INFERENCE_JOBS.labels(
+            outcome="retried" if requeued else "dead_lettered",
+        ).inc()
+        if not requeued:
+            # Let the client's SSE stream end instead of waiting forever
+            await JobChannel(
+                get_job_event_broker(),
+                job.job_id,
+                job.query.user_id,
+            ).finish()
+
+    async def run(self) -> None:
+        await self.queue.ensure_group()
+        tasks: set[asyncio.Task] = set()
+
+        while not self.stopping.is_set():
+            free = self.concurrency - len(tasks)
+            if free == 0:
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            jobs = await self.queue.claim_stale(self.consumer, free)
+            if not jobs:
+                jobs = await self.queue.read(self.consumer, free, READ_BLOCK_SECONDS)
+
+            for job in jobs:
+                task = asyncio.create_task(self.__handle(job))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            await self.queue.record_depth()
+
+        logger.info("Draining %s running inference jobs", len(tasks))
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_worker(index: int) -> None:
+    worker = InferenceWorker(
+        queue=get_inference_queue(),
+        transaction_service=build_transaction_service(),
+        concurrency=config.INFERENCE_WORKER_CONCURRENCY,
+        consumer=f"{os.uname().nodename}-{os.getpid()}-{index}",
+    )
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stopping.set)
+
+    if uses_ollama() and config.OLLAMA_WARM_UP:
+        ollama_warmer.start(ollama_models())
+    try:
+        await worker.run()
+    finally:
+        await ollama_warmer.stop()
+        await close_redis_pools()
+
+
+def worker_process(index: int) -> None:
+    start_http_server(config.INFERENCE_WORKER_METRICS_PORT + index)
+    logger.info("Inference worker %s started", index)
+    asyncio.run(run_worker(index))
+
+
+def main() -> None:
+    if config.INFERENCE_WORKER_PROCESSES <= 1:
+        worker_process(0)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=worker_process, args=(index,))
+        for index in range(config.INFERENCE_WORKER_PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+
+    def stop(_signum, _frame) -> None:
+        for process in processes:
+            process.terminate()
+
+    # Ctrl+C reaches the whole process group, SIGTERM only this process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, stop)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.transaction.model import TransactionLLMCreate, TransactionLLMCreateRequest
+from src.transaction.service import TransactionService
+
+QUERY = TransactionLLMCreateRequest(text="grab 12", account_id=1, user_id=1)
+CATEGORIES = [
+    SimpleNamespace(id=1, lower_cased_name="unknown"),
+    SimpleNamespace(id=2, lower_cased_name="transport"),
+]
+
+
+class StubAgent:
+    def __init__(self) -> None:
+        self.calls: list[tuple[list[str], str]] = []
+
+    async def suggest_categories(self, names, user_id, category_list, call):
+        self.calls.append((names, call))
+        return [["transport"] for _ in names]
+
+
+def create_service(agent: StubAgent) -> TransactionService:
+    return TransactionService(
+        llm_service=None,  # type: ignore[arg-type]
+        transaction_repository=None,  # type: ignore[arg-type]
+        category_service=None,  # type: ignore[arg-type]
+        transaction_agent=agent,  # type: ignore[arg-type]
+        redis_client=None,  # type: ignore[arg-type]
+        account_service=None,  # type: ignore[arg-type]
+    )
+
+
+def categorize(service: TransactionService, speculative):
+    transactions = [
+        TransactionLLMCreate(
+            name="grab",
+            amount=12,
+            category_name="unknown",
+            date="2026-10-19",
+        ),
+    ]
+
+    async def run():
+        return await service.categorize_transactions(
+            QUERY,
+            transactions,  # type: ignore[arg-type]
+            CATEGORIES,  # type: ignore[arg-type]
+            speculative_suggestion=asyncio.create_task(speculative()),
+        )
+
+    return asyncio.run(run())
+
+
+def test_speculative_suggestion_is_used_for_a_single_unknown_item():
+    agent = StubAgent()
+
+    async def speculative():
+        return [[2]]
+
+    categories = categorize(create_service(agent), speculative)
+
+    assert categories[0][1] == [2]
+    assert agent.calls == []
+
+
+def test_failed_speculative_suggestion_falls_back_to_batched_call():
+    agent = StubAgent()
+
+    async def speculative():
+        msg = "provider is down"
+        raise RuntimeError(msg)
+
+    categories = categorize(create_service(agent), speculative)
+
+    assert categories[0][1] == [2]
+    assert agent.calls == [(["grab"], "suggest_categories")]
@@ -0,0 +1,62 @@
+from src.transaction.chunking import merge_chunk_results, split_into_chunks
+from src.transaction.model import TransactionLLMCreate
+
+
+def item(name: str, amount: float) -> TransactionLLMCreate:
+    return TransactionLLMCreate(
+        name=name,
+        amount=amount,
+        category_name="food",
+        date="2026-10-19",
+    )
+
+
+def test_split_repeats_overlap_lines():
+    text = "coffee 5\ncoffee 5\ntea 3\nbagel 4"
+
+    assert split_into_chunks(text, max_chars=16, overlap_lines=1) == [
+        "coffee 5\ncoffee 5",
+        "coffee 5\ntea 3",
+        "tea 3\nbagel 4",
+    ]
+
+
+def test_merge_drops_overlap_items():
+    chunk_results = [
+        [item("coffee", 5), item("tea", 3)],
+        [item("tea", 3), item("bagel", 4)],
+    ]
+
+    assert merge_chunk_results(chunk_results, overlap_lines=1) == [
+        item("coffee", 5),
+        item("tea", 3),
+        item("bagel", 4),
+    ]
+
+
+def test_merge_keeps_consecutive_repeated_purchases():
+    # "coffee 5" three times in a row, the chunk edge falls between them
+    chunk_results = [
+        [item("coffee", 5), item("coffee", 5)],
+        [item("coffee", 5), item("coffee", 5)],
+    ]
+
+    assert merge_chunk_results(chunk_results, overlap_lines=1) == [
+        item("coffee", 5),
+        item("coffee", 5),
+        item("coffee", 5),
+    ]
+
+
+def test_merge_keeps_head_items_not_in_previous_tail():
+    # The overlap line was cut mid-item and only the second chunk read it
+    chunk_results = [
+        [item("coffee", 5)],
+        [item("tea", 3), item("coffee", 5)],
+    ]
+
+    assert merge_chunk_results(chunk_results, overlap_lines=1) == [
+        item("coffee", 5),
+        item("tea", 3),
+        item("coffee", 5),
+    ]
@@ -0,0 +1,29 @@
+import pytest
+
+from src.transaction.heuristics import score_inference_complexity
+
+
+@pytest.mark.parametrize(
+    ("text", "amounts"),
+    [
+        ("coffee 5", 1),
+        ("coffee 5 and tea 3", 2),
+        ("coffee 5 2024-01-05", 1),
+        ("lunch 12.50 on 05/01/2024", 1),
+        ("bus 2.5 1.2.2024", 1),
+        ("rent 1200 01/05", 1),
+        ("taxi 30 5th Jan", 1),
+        ("groceries 40 jan 5", 1),
+    ],
+)
+def test_dates_are_not_counted_as_amounts(text, amounts):
+    assert score_inference_complexity(text, []).amounts == amounts
+
+
+def test_two_accounts_look_like_transfer():
+    complexity = score_inference_complexity(
+        "500 from checking to savings",
+        ["Checking", "Savings"],
+    )
+
+    assert complexity.looks_like_transfer
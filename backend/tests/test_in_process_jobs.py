@@ -0,0 +1,121 @@
+import asyncio
+
+from src.transaction.cancellation import InProcessJobCancellation
+from src.transaction.coalescing import InProcessJobCoalescer
+from src.transaction.events import DONE_EVENT, InProcessJobEventBroker, job_stream_key
+from src.transaction.job_status import InProcessJobStatusTracker
+from src.transaction.model import JobState, TransactionLLMCreateRequest
+from src.transaction.service import TransactionService
+
+QUERY = TransactionLLMCreateRequest(text="coffee 5", account_id=1, user_id=1)
+
+
+def test_coalescer_returns_the_first_job_within_the_window():
+    coalescer = InProcessJobCoalescer(window_seconds=5)
+
+    async def claim_all():
+        return [
+            await coalescer.claim("a", "job-1"),
+            await coalescer.claim("a", "job-2"),
+            await coalescer.claim("b", "job-3"),
+        ]
+
+    assert asyncio.run(claim_all()) == ["job-1", "job-1", "job-3"]
+
+
+def test_status_tracker_merges_updates():
+    tracker = InProcessJobStatusTracker(ttl_seconds=60)
+
+    async def track():
+        await tracker.queued("job")
+        await tracker.update("job", "inferred", items_inferred=2)
+        return await tracker.get("job")
+
+    status = asyncio.run(track())
+
+    assert status is not None
+    assert status.state == JobState.queued
+    assert status.items_inferred == 2
+    assert list(status.stages) == ["queued", "inferred"]
+
+
+def test_last_reader_leaving_cancels_the_job():
+    cancellation = InProcessJobCancellation(ttl_seconds=60)
+
+    async def follow_and_leave():
+        await cancellation.attach("job")
+        await cancellation.attach("job")
+        cancellation.detach("job", cancel_after=0)
+        await asyncio.sleep(0.01)
+        still_running = not await cancellation.is_cancelled("job")
+        cancellation.detach("job", cancel_after=0)
+        await asyncio.sleep(0.01)
+        return still_running, await cancellation.is_cancelled("job")
+
+    assert asyncio.run(follow_and_leave()) == (True, True)
+
+
+def test_failed_in_process_job_is_marked_failed_and_finished(monkeypatch):
+    service = TransactionService(
+        llm_service=None,  # type: ignore[arg-type]
+        transaction_repository=None,  # type: ignore[arg-type]
+        category_service=None,  # type: ignore[arg-type]
+        transaction_agent=None,  # type: ignore[arg-type]
+        redis_client=None,  # type: ignore[arg-type]
+        account_service=None,  # type: ignore[arg-type]
+    )
+    service.job_status = InProcessJobStatusTracker(ttl_seconds=60)
+    service.job_events = InProcessJobEventBroker(
+        maxlen=100,
+        ttl_seconds=60,
+        done_ttl_seconds=60,
+    )
+
+    async def fail(query, job_id):
+        msg = "provider is down"
+        raise RuntimeError(msg)
+
+    monkeypatch.setattr(service, "infer_and_create_transaction", fail)
+
+    async def run():
+        await service.run_job_in_process(QUERY, "job")
+        events = await service.job_events.read(job_stream_key("job"), "0-0", block=0)
+        return await service.job_status.get("job"), events
+
+    status, events = asyncio.run(run())
+
+    assert status is not None
+    assert status.state == JobState.failed
+    assert "provider is down" in (status.error or "")
+    assert [data for _, data in events] == [DONE_EVENT]
+
+
+def test_retry_of_a_persisted_job_only_finishes_it():
+    service = TransactionService(
+        llm_service=None,  # type: ignore[arg-type]
+        transaction_repository=None,  # type: ignore[arg-type]
+        category_service=None,  # type: ignore[arg-type]
+        transaction_agent=None,  # type: ignore[arg-type]
+        redis_client=None,  # type: ignore[arg-type]
+        account_service=None,  # type: ignore[arg-type]
+    )
+    service.job_status = InProcessJobStatusTracker(ttl_seconds=60)
+    service.job_events = InProcessJobEventBroker(
+        maxlen=100,
+        ttl_seconds=60,
+        done_ttl_seconds=60,
+    )
+    service.job_cancellation = InProcessJobCancellation(ttl_seconds=60)
+
+    async def run():
+        await service.job_status.update("job", "persisted", items_persisted=1)
+        state = await service.infer_and_create_transaction(QUERY, "job")
+        events = await service.job_events.read(job_stream_key("job"), "0-0", block=0)
+        return state, await service.job_status.get("job"), events
+
+    state, status, events = asyncio.run(run())
+
+    assert state == JobState.done
+    assert status is not None
+    assert status.state == JobState.done
+    assert [data for _, data in events] == [DONE_EVENT]
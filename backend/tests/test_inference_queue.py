@@ -0,0 +1,62 @@
+import asyncio
+
+from src.transaction.model import TransactionLLMCreateRequest
+from src.transaction.queue import InferenceQueue
+
+QUERY = TransactionLLMCreateRequest(text="coffee 5", account_id=1, user_id=1)
+
+
+class StubRedis:
+    def __init__(self, times_delivered: int) -> None:
+        self.times_delivered = times_delivered
+        self.added: list[tuple[str, dict]] = []
+        self.acked: list[str] = []
+
+    async def xautoclaim(self, key, group, consumer, min_idle_time, count):
+        fields = {"job_id": "job", "query": QUERY.model_dump_json(), "attempts": "0"}
+        return "0-0", [("1-0", fields)], []
+
+    async def xpending_range(self, key, group, min, max, count):  # noqa: A002
+        return [{"message_id": min, "times_delivered": self.times_delivered}]
+
+    async def xadd(self, key, fields):
+        self.added.append((key, fields))
+        return "2-0"
+
+    async def xack(self, key, group, message_id):
+        self.acked.append(message_id)
+
+    async def xdel(self, key, message_id):
+        pass
+
+
+def create_queue(redis_client: StubRedis) -> InferenceQueue:
+    return InferenceQueue(
+        redis_client=redis_client,  # type: ignore[arg-type]
+        key="queue",
+        group="workers",
+        visibility_timeout=60,
+        max_attempts=3,
+        max_depth=100,
+    )
+
+
+def test_reclaimed_job_counts_the_deliveries_of_dead_workers():
+    redis_client = StubRedis(times_delivered=3)
+    queue = create_queue(redis_client)
+
+    async def reclaim_and_retry():
+        [job] = await queue.claim_stale("worker", count=1)
+        return job, await queue.retry(job)
+
+    job, requeued = asyncio.run(reclaim_and_retry())
+
+    assert job.attempts == 2
+    assert not requeued
+    assert redis_client.added == [
+        (
+            "queue:dead",
+            {"job_id": "job", "query": QUERY.model_dump_json(), "attempts": "3"},
+        ),
+    ]
+    assert redis_client.acked == ["1-0"]
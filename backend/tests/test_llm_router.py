@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from src.common.llm_router import (
+    AllProvidersFailedError,
+    LLMRouter,
+    ProviderHealth,
+    RoutedProvider,
+)
+from src.common.providers import Generation, LLMProvider
+
+
+class StubProvider(LLMProvider):
+    """Answers with its own name after `delay` seconds, or fails."""
+
+    def __init__(self, name: str, delay: float = 0, fail: bool = False) -> None:  # noqa: FBT001, FBT002
+        super().__init__("fake")
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def generate(
+        self,
+        model: str,
+        contents: str,
+        instruction: str,
+        temperature: float = 0,
+        tools=None,
+        cached_content=None,
+    ) -> Generation:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            msg = f"{self.name} is down"
+            raise RuntimeError(msg)
+        return Generation(text=self.name)
+
+    def create_instructor_client(self):
+        raise NotImplementedError
+
+
+def create_router(*providers: StubProvider, deadline: float = 1) -> LLMRouter:
+    return LLMRouter(
+        providers=[
+            RoutedProvider(
+                provider=provider,
+                health=ProviderHealth(window=10, unhealthy_error_rate=0.5),
+            )
+            for provider in providers
+        ],
+        hedge_percentile=0.95,
+        default_hedge_delay=0.05,
+        default_deadline=deadline,
+    )
+
+
+async def request(provider: LLMProvider, model: str):
+    resp = await provider.generate(model=model, contents="", instruction="")
+    return resp.text, None
+
+
+def test_call_uses_first_provider():
+    primary, secondary = StubProvider("primary"), StubProvider("secondary")
+    router = create_router(primary, secondary)
+
+    assert asyncio.run(router.call("test", request)) == "primary"
+    assert secondary.calls == 0
+
+
+def test_call_falls_back_on_failure():
+    primary = StubProvider("primary", fail=True)
+    secondary = StubProvider("secondary")
+    router = create_router(primary, secondary)
+
+    assert asyncio.run(router.call("test", request)) == "secondary"
+    assert primary.calls == 1
+
+
+def test_call_hedges_slow_provider():
+    primary = StubProvider("primary", delay=0.5)
+    secondary = StubProvider("secondary")
+    router = create_router(primary, secondary)
+
+    assert asyncio.run(router.call("test", request)) == "secondary"
+    assert primary.calls == 1
+
+
+def test_call_times_out_at_deadline():
+    router = create_router(StubProvider("primary", delay=1), deadline=0.05)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(router.call("test", request))
+
+
+def test_call_raises_when_all_providers_fail():
+    router = create_router(
+        StubProvider("primary", fail=True),
+        StubProvider("secondary", fail=True),
+    )
+
+    with pytest.raises(AllProvidersFailedError):
+        asyncio.run(router.call("test", request))
+
+
+def test_unhealthy_provider_is_tried_last():
+    primary = StubProvider("primary", fail=True)
+    secondary = StubProvider("secondary")
+    router = create_router(primary, secondary)
+
+    for _ in range(5):
+        asyncio.run(router.call("test", request))
+
+    assert [provider.name for provider in router.ordered_providers()] == [
+        "secondary",
+        "primary",
+    ]
+    calls = primary.calls
+    assert asyncio.run(router.call("test", request)) == "secondary"
+    assert primary.calls == calls
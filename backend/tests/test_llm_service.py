@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+from instructor.exceptions import InstructorRetryException
+from pydantic import BaseModel
+
+from src.common import llm
+from src.common.llm_router import LLMRouter, ProviderHealth, RoutedProvider
+from src.common.providers import Generation, LLMProvider
+
+
+class Suggestion(BaseModel):
+    name: str
+    score: int
+
+
+class StubProvider(LLMProvider):
+    """Rejects the first structured call with `output`, then answers."""
+
+    def __init__(self, output: str) -> None:
+        super().__init__("fake")
+        self.output = output
+        self.calls: list[dict] = []
+
+    async def generate(self, *args, **kwargs) -> Generation:
+        raise NotImplementedError
+
+    def create_instructor_client(self):
+        raise NotImplementedError
+
+    async def structured(self, model, messages, response_model, max_retries=1):
+        self.calls.append({"messages": messages, "max_retries": max_retries})
+        if len(self.calls) == 1:
+            raise InstructorRetryException(
+                "score: Input should be a valid integer",
+                last_completion=SimpleNamespace(text=self.output),
+                n_attempts=1,
+                total_usage=0,
+            )
+        return response_model(name="coffee", score=1), None
+
+
+def query(monkeypatch, provider: StubProvider) -> Suggestion:
+    router = LLMRouter(
+        providers=[
+            RoutedProvider(
+                provider=provider,
+                health=ProviderHealth(window=10, unhealthy_error_rate=0.5),
+            ),
+        ],
+        hedge_percentile=0.95,
+        default_hedge_delay=1,
+        default_deadline=1,
+    )
+    monkeypatch.setattr(llm, "get_llm_router", lambda: router)
+    return asyncio.run(
+        llm.LLMService().aquery_llm_with_validator("suggest", Suggestion),
+    )
+
+
+def test_near_valid_output_is_repaired_without_reask(monkeypatch):
+    provider = StubProvider('```json\n{"name": "coffee", "score": "2"}\n```')
+
+    assert query(monkeypatch, provider) == Suggestion(name="coffee", score=2)
+    assert len(provider.calls) == 1
+
+
+def test_invalid_output_is_reasked_once_with_the_error(monkeypatch):
+    provider = StubProvider('{"name": "coffee", "score": "high"}')
+
+    assert query(monkeypatch, provider) == Suggestion(name="coffee", score=1)
+    assert len(provider.calls) == 2
+    reask = provider.calls[1]
+    assert reask["max_retries"] == 1
+    assert [message["role"] for message in reask["messages"]] == [
+        "user",
+        "assistant",
+        "user",
+    ]
+    assert reask["messages"][1]["content"] == provider.output
+    assert "valid integer" in reask["messages"][2]["content"]
@@ -0,0 +1,46 @@
+import asyncio
+
+from src.common import providers
+from src.common.providers import provider_models
+
+
+def test_model_overrides_apply_to_their_provider_only(monkeypatch):
+    monkeypatch.setattr(providers.config, "OLLAMA_SMALL_MODEL", "qwen2.5:3b")
+
+    assert provider_models("ollama") == {
+        "small": "qwen2.5:3b",
+        "large": "qwen2.5:14b",
+        "structured": "gemma3:12b",
+    }
+    assert provider_models("gemini")["small"] == "gemini-2.0-flash-lite"
+
+
+def test_only_routed_ollama_models_are_warmed(monkeypatch):
+    from src.common import llm
+
+    monkeypatch.setattr(llm, "PROVIDER", "gemini")
+    monkeypatch.setattr(llm.config, "LLM_ROUTER_PROVIDERS", "ollama")
+    monkeypatch.setattr(llm.config, "AGENT_PROVIDER", "gemini")
+    assert llm.ollama_models() == ["gemma3:12b"]
+
+    monkeypatch.setattr(llm.config, "AGENT_PROVIDER", "ollama")
+    assert llm.ollama_models() == ["gemma3:12b", "qwen2.5:7b", "qwen2.5:14b"]
+
+    monkeypatch.setattr(llm.config, "LLM_ROUTER_PROVIDERS", "")
+    monkeypatch.setattr(llm.config, "AGENT_PROVIDER", "")
+    assert llm.ollama_models() == []
+
+
+def test_fake_provider_has_no_context_caches():
+    provider = providers.GeminiProvider("fake")
+
+    cache_name = asyncio.run(
+        provider.create_context_cache(
+            model="fake",
+            instruction="instruction",
+            tools=[],
+            ttl=60,
+        ),
+    )
+
+    assert cache_name is None
@@ -0,0 +1,122 @@
+import asyncio
+from string import ascii_lowercase
+
+import pytest
+
+from src.account.model import AccountTransfer
+from src.common.fake_llm import fake_latency
+from src.common.llm import create_llm_router
+from src.common.metrics import LLMCallRecorder
+from src.common.providers import get_llm_provider
+from src.transaction import agent as agent_module
+from src.transaction.agent import TransactionAgent
+from src.transaction.model import TransactionLLMCreate
+from src.transaction.prompt import BuiltPrompt
+
+CATEGORIES = ["coffee", "groceries", "rent", "unknown"]
+ACCOUNTS = [AccountTransfer(id=1, name="Checking"), AccountTransfer(id=2, name="Savings")]
+
+
+@pytest.fixture(autouse=True)
+def fast_fake_latency(monkeypatch):
+    # Short, varying latency so the calls interleave on the event loop
+    monkeypatch.setattr(fake_latency, "distribution", "exponential")
+    monkeypatch.setattr(fake_latency, "mean", 0.005)
+    monkeypatch.setattr(fake_latency, "failure_rate", 0)
+
+
+def test_parallel_inference_on_shared_agent_keeps_results_apart():
+    agent = TransactionAgent(router=create_llm_router(["fake"]))
+    # Amounts are parsed from the first number, so names carry letters only
+    tags = {
+        user_id: ascii_lowercase[user_id % 26] * (1 + user_id // 26)
+        for user_id in range(1, 41)
+    }
+    texts = {
+        user_id: f"coffee {tag} {user_id}.50\ngroceries {tag} {user_id + 100}"
+        for user_id, tag in tags.items()
+    }
+
+    async def infer_all():
+        return await asyncio.gather(
+            *(
+                agent.infer_from_text(
+                    text=text,
+                    user_id=user_id,
+                    category_list=CATEGORIES,
+                    account_list=ACCOUNTS,
+                )
+                for user_id, text in texts.items()
+            ),
+        )
+
+    results = asyncio.run(infer_all())
+
+    for user_id, transactions in zip(texts, results, strict=True):
+        assert all(isinstance(t, TransactionLLMCreate) for t in transactions)
+        assert [(t.name, t.amount) for t in transactions] == [
+            (f"coffee {tags[user_id]}", user_id + 0.5),
+            (f"groceries {tags[user_id]}", user_id + 100),
+        ]
+        assert [t.category_name for t in transactions] == ["coffee", "groceries"]
+
+
+def test_context_caches_are_shared_by_prompt_and_bounded(monkeypatch):
+    monkeypatch.setattr(agent_module.config, "GEMINI_CONTEXT_CACHE", True)
+    monkeypatch.setattr(agent_module.config, "GEMINI_CONTEXT_CACHE_MIN_TOKENS", 0)
+    monkeypatch.setattr(agent_module.config, "GEMINI_CONTEXT_CACHE_MAX_ENTRIES", 2)
+    provider = get_llm_provider("fake")
+    created: list[str] = []
+
+    async def create_context_cache(model, instruction, tools, ttl):
+        created.append(instruction)
+        return f"cachedContents/{len(created)}"
+
+    monkeypatch.setattr(provider, "create_context_cache", create_context_cache)
+    agent = TransactionAgent(router=create_llm_router(["fake"]))
+    get_cached_content = agent._TransactionAgent__get_cached_content  # noqa: SLF001
+
+    async def cache_names(*prompts: BuiltPrompt) -> list[str | None]:
+        return [await get_cached_content(provider, "fake", prompt) for prompt in prompts]
+
+    # Users 1 and 2 have the same instruction, so they share a cache
+    first, second, third = (
+        BuiltPrompt(key=("infer", user_id), instruction=instruction)
+        for user_id, instruction in [(1, "a"), (2, "a"), (3, "b")]
+    )
+    assert asyncio.run(cache_names(first, second)) == [
+        "cachedContents/1",
+        "cachedContents/1",
+    ]
+
+    # The third distinct instruction evicts the least recently used one
+    fourth = BuiltPrompt(key=("infer", 4), instruction="c")
+    assert asyncio.run(cache_names(third, fourth, first)) == [
+        "cachedContents/2",
+        "cachedContents/3",
+        "cachedContents/4",
+    ]
+    assert created == ["a", "b", "c", "a"]
+
+
+def test_inference_marks_its_first_chunk(monkeypatch):
+    marked: list[str] = []
+    first_chunk = LLMCallRecorder.first_chunk
+
+    def record_first_chunk(recorder: LLMCallRecorder) -> None:
+        marked.append(recorder.labels["call"])
+        first_chunk(recorder)
+
+    monkeypatch.setattr(LLMCallRecorder, "first_chunk", record_first_chunk)
+    agent = TransactionAgent(router=create_llm_router(["fake"]))
+
+    asyncio.run(
+        agent.infer_from_text(
+            text="coffee 5",
+            user_id=1,
+            category_list=CATEGORIES,
+            account_list=ACCOUNTS,
+        ),
+    )
+
+    assert marked == ["infer_from_text"]